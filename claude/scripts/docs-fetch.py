@@ -10,26 +10,265 @@ import sys
 import time
 import subprocess
 from urllib.parse import urljoin, urlparse
+from urllib.request import getproxies, proxy_bypass
 from pathlib import Path
 import json
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import logging
 import tempfile
+import filecmp
+import gzip
+import zlib
+import ssl
+import socket
+import threading
+import queue
+import http.client
+import hashlib
+import asyncio
+import importlib.util
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_for_futures
+from collections import deque
+from contextlib import contextmanager
+from html.parser import HTMLParser
+
+try:
+    import fcntl
+except ImportError:  # Windows: rate limit state is shared between threads only
+    fcntl = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def atomic_write(path: Path, data: bytes):
+    """Write data to path via a temporary file and rename, so readers never see a partial file."""
+    fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def exclusive_file_lock(lock_file: Path):
+    """Hold an exclusive flock on lock_file, shared by every process that uses it."""
+    if fcntl is None:
+        yield
+        return
+    with open(lock_file, 'a+') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+# Prompt for the Technical Writer agent; part of the agent memo key, so editing it
+# invalidates memoized output
+TECHNICAL_WRITER_PROMPT = """Please review and organize this {content_type} documentation for the {library_name} library. 
+
+Structure the content to be AI-friendly with:
+1. Clear hierarchical headings
+2. Consistent formatting
+3. Proper code block formatting
+4. Logical flow and organization
+5. Remove any redundant navigation or promotional content
+6. Focus on technical content that helps developers
+
+The content should be optimized for Claude Code to understand and reference when helping developers.
+
+Original content is in: {temp_path}
+
+Please create well-structured, AI-optimized documentation."""
+
+# markdown-converter.py lives next to this script; its hyphenated name rules out a plain import
+MARKDOWN_CONVERTER_PATH = Path(__file__).parent / "markdown-converter.py"
+_markdown_converter_module = None  # False once an import attempt has failed
+_markdown_converter_lock = threading.Lock()
+
+def load_markdown_converter():
+    """Import markdown-converter.py once per process; returns the module or None."""
+    global _markdown_converter_module
+    
+    with _markdown_converter_lock:
+        if _markdown_converter_module is None:
+            try:
+                spec = importlib.util.spec_from_file_location('markdown_converter', MARKDOWN_CONVERTER_PATH)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                _markdown_converter_module = module
+            except Exception as e:
+                logger.warning(f"Could not import markdown converter: {str(e)}")
+                _markdown_converter_module = False
+        
+        return _markdown_converter_module or None
+
+# Markdown structure used to split large pages for the Technical Writer agent
+MARKDOWN_HEADING_RE = re.compile(r'^(#{1,6})([ \t]+\S.*)$')
+MARKDOWN_FENCE_RE = re.compile(r'^[ \t]{0,3}(`{3,}|~{3,})')
+
+def _scan_markdown_lines(markdown: str):
+    """Yield (line, heading level or None, open fence or None) for each line.
+    
+    Heading-like lines inside fenced code blocks are not headings. The fence is the
+    one open after the line, so an opening fence line reports itself.
+    """
+    fence = None
+    for line in markdown.split('\n'):
+        if fence:
+            stripped = line.strip()
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                fence = None
+            yield line, None, fence
+            continue
+        
+        match = MARKDOWN_FENCE_RE.match(line)
+        if match:
+            fence = match.group(1)
+            yield line, None, fence
+            continue
+        
+        heading = MARKDOWN_HEADING_RE.match(line)
+        yield line, len(heading.group(1)) if heading else None, None
+
+def split_markdown_chunks(markdown: str, max_chars: int) -> List[Dict]:
+    """Split Markdown at heading boundaries into pieces of at most about max_chars.
+    
+    Whole sections are packed greedily; a section larger than max_chars is cut at blank
+    lines, or at line breaks when a paragraph alone is too large (closing and reopening
+    any code fence it cuts through). Each chunk records the headings above it ('trail')
+    and its shallowest heading level ('level'), which may come from any section packed
+    into it.
+    """
+    # Sections: each heading starts one; trail holds (level, title) of the open headings
+    sections = []
+    trail = []
+    current = {'lines': [], 'trail': [], 'level': 1}
+    for line, level, _ in _scan_markdown_lines(markdown):
+        if level:
+            if current['lines']:
+                sections.append(current)
+            while trail and trail[-1][0] >= level:
+                trail.pop()
+            trail.append((level, line.lstrip('#').strip()))
+            current = {'lines': [], 'trail': [title for _, title in trail], 'level': level}
+        current['lines'].append(line)
+    sections.append(current)
+    
+    chunks = []
+    for section in sections:
+        text = '\n'.join(section['lines'])
+        pieces = [text] if len(text) <= max_chars else _split_oversized_section(text, max_chars)
+        for index, piece in enumerate(pieces):
+            # Continuation pieces have no heading of their own; keep them below the section's
+            level = section['level'] if index == 0 else min(section['level'] + 1, 6)
+            if chunks and index == 0 and len(chunks[-1]['text']) + 1 + len(piece) <= max_chars:
+                chunks[-1]['text'] += '\n' + piece
+            else:
+                chunks.append({'text': piece, 'trail': section['trail'], 'level': level})
+    
+    # Packed sections can be shallower than the first one (### Deep then ## B)
+    for chunk in chunks:
+        levels = [level for _, level, _ in _scan_markdown_lines(chunk['text']) if level]
+        if levels:
+            chunk['level'] = min(levels)
+    return chunks
+
+def _split_oversized_section(text: str, max_chars: int) -> List[str]:
+    """Cut one section into pieces of at most about max_chars, preferring blank lines."""
+    pieces = []
+    lines = []
+    size = 0
+    last_break = None  # Index in lines just after the most recent blank line outside a fence
+    opening_fence = None  # Opening line of the fence open at the end of lines
+    
+    for line, _, fence in _scan_markdown_lines(text):
+        if size + len(line) + 1 > max_chars and lines:
+            if last_break:
+                pieces.append('\n'.join(lines[:last_break]))
+                lines = lines[last_break:]
+            elif opening_fence:
+                pieces.append('\n'.join(lines + [MARKDOWN_FENCE_RE.match(opening_fence).group(1)]))
+                lines = [opening_fence]
+            else:
+                pieces.append('\n'.join(lines))
+                lines = []
+            size = sum(len(kept) + 1 for kept in lines)
+            last_break = None
+        
+        lines.append(line)
+        size += len(line) + 1
+        if fence and not opening_fence:
+            opening_fence = line
+        elif not fence:
+            opening_fence = None
+            if not line.strip():
+                last_break = len(lines)
+    
+    if lines:
+        pieces.append('\n'.join(lines))
+    return pieces
+
+def merge_organized_chunks(chunks: List[Dict], outputs: List[str]) -> str:
+    """Join organized chunks in order, re-leveling each chunk's headings to where it came from.
+    
+    The shallowest heading in each output is mapped to the chunk's level and the others
+    keep their relative depth, so the merged page has the original hierarchy no matter
+    how the agent leveled each piece.
+    """
+    merged = []
+    for chunk, output in zip(chunks, outputs):
+        scanned = list(_scan_markdown_lines(output.strip('\n')))
+        levels = [level for _, level, _ in scanned if level]
+        shift = chunk['level'] - min(levels) if levels else 0
+        
+        lines = []
+        for line, level, _ in scanned:
+            if level and shift:
+                heading = MARKDOWN_HEADING_RE.match(line)
+                line = '#' * max(1, min(6, level + shift)) + heading.group(2)
+            lines.append(line)
+        merged.append('\n'.join(lines))
+    return '\n\n'.join(merged) + '\n'
+
 class ContentQualityValidator:
     """Validates content quality and completeness."""
     
+    # Tag counters used by the content scanner (compiled once, case-insensitive)
+    HEADING_RE = re.compile(r'<h[1-6][^>]*>', re.IGNORECASE)
+    CODE_BLOCK_RE = re.compile(r'<pre[^>]*>|<code[^>]*>', re.IGNORECASE)
+    LINK_RE = re.compile(r'<a[^>]*href', re.IGNORECASE)
+    PARAGRAPH_RE = re.compile(r'<p[^>]*>', re.IGNORECASE)
+    TAG_RE = re.compile(r'<[^>]+>')
+    
+    # Characters of page scanned per block by _calculate_content_metrics
+    SCAN_BLOCK_SIZE = 64 * 1024
+    
+    DOC_KEYWORDS = (
+        'api', 'documentation', 'guide', 'tutorial', 'reference',
+        'function', 'method', 'class', 'parameter', 'example',
+        'usage', 'install', 'configuration'
+    )
+    
+    # JS loading indicators (bad signs)
+    JS_INDICATORS = (
+        'loading...', 'please wait', 'javascript required',
+        'enable javascript', 'noscript', 'document.getelementbyid'
+    )
+    
     def __init__(self):
         self.quality_thresholds = {
             'min_content_length': 500,
             'min_headings': 2,
             'min_code_blocks': 0,
-            'max_js_indicators': 3
+            'max_js_indicators': 3,
+            'min_text_length': 200
         }
     
     def validate_content_quality(self, content: str, url: str) -> Dict:
@@ -55,42 +294,79 @@ class ContentQualityValidator:
         }
     
     def _calculate_content_metrics(self, content: str) -> Dict:
-        """Calculate various content quality metrics."""
-        content_lower = content.lower()
-        
+        """Calculate all content quality metrics in one pass over the page.
+        
+        The page is walked once in SCAN_BLOCK_SIZE blocks, and every tag counter, keyword
+        count and the visible-text measure run on a block while it is still in cache.
+        Blocks end just after a '>', so no tag match or keyword (none contains '>')
+        straddles two blocks and the per-block counts add up to whole-page counts.
+        Only one block is lower-cased at a time, and text is only measured until the
+        minimum-text threshold is reached.
+        """
+        text_limit = self.quality_thresholds['min_text_length']
         metrics = {
             'length': len(content),
-            'headings': len(re.findall(r'<h[1-6][^>]*>', content, re.IGNORECASE)),
-            'code_blocks': len(re.findall(r'<pre[^>]*>|<code[^>]*>', content, re.IGNORECASE)),
-            'links': len(re.findall(r'<a[^>]*href', content, re.IGNORECASE)),
-            'paragraphs': len(re.findall(r'<p[^>]*>', content, re.IGNORECASE)),
+            'headings': 0,
+            'code_blocks': 0,
+            'links': 0,
+            'paragraphs': 0,
             'documentation_keywords': 0,
-            'js_loading_indicators': 0
+            'js_loading_indicators': 0,
+            'text_length': 0
         }
+        pending_space = False
+        start = 0
         
-        # Count documentation keywords
-        doc_keywords = [
-            'api', 'documentation', 'guide', 'tutorial', 'reference',
-            'function', 'method', 'class', 'parameter', 'example',
-            'usage', 'install', 'configuration'
-        ]
-        
-        for keyword in doc_keywords:
-            if keyword in content_lower:
-                metrics['documentation_keywords'] += content_lower.count(keyword)
-        
-        # Count JS loading indicators (bad signs)
-        js_indicators = [
-            'loading...', 'please wait', 'javascript required',
-            'enable javascript', 'noscript', 'document.getelementbyid'
-        ]
-        
-        for indicator in js_indicators:
-            if indicator in content_lower:
-                metrics['js_loading_indicators'] += content_lower.count(indicator)
+        while start < len(content):
+            end = content.find('>', start + self.SCAN_BLOCK_SIZE) + 1 or len(content)
+            block = content[start:end]
+            block_lower = block.lower()
+            
+            metrics['headings'] += len(self.HEADING_RE.findall(block))
+            metrics['code_blocks'] += len(self.CODE_BLOCK_RE.findall(block))
+            metrics['links'] += len(self.LINK_RE.findall(block))
+            metrics['paragraphs'] += len(self.PARAGRAPH_RE.findall(block))
+            metrics['documentation_keywords'] += sum(block_lower.count(keyword) for keyword in self.DOC_KEYWORDS)
+            metrics['js_loading_indicators'] += sum(block_lower.count(indicator) for indicator in self.JS_INDICATORS)
+            if metrics['text_length'] < text_limit:
+                metrics['text_length'], pending_space = self._measure_text_length(
+                    block, text_limit, metrics['text_length'], pending_space)
+            
+            start = end
         
         return metrics
     
+    def _measure_text_length(self, content: str, limit: int, length: int,
+                             pending_space: bool) -> Tuple[int, bool]:
+        """Add a block's tag-stripped, whitespace-collapsed text length, up to `limit` characters.
+        
+        Equivalent to stripping tags to spaces, collapsing whitespace and stripping the
+        result, but stops scanning as soon as the limit is reached. Returns the running
+        length and whether a space is pending, to carry into the next block.
+        """
+        position = 0
+        
+        for match in self.TAG_RE.finditer(content):
+            length, pending_space = self._add_text_segment(content[position:match.start()], length, pending_space)
+            if length >= limit:
+                return length, pending_space
+            pending_space = True  # A stripped tag acts as whitespace
+            position = match.end()
+        
+        return self._add_text_segment(content[position:], length, pending_space)
+    
+    @staticmethod
+    def _add_text_segment(segment: str, length: int, pending_space: bool) -> Tuple[int, bool]:
+        """Add one text segment to a running collapsed-text length."""
+        words = segment.split()
+        if not words:
+            return length, pending_space or bool(segment)
+        
+        if length and (pending_space or segment[0].isspace()):
+            length += 1
+        length += sum(map(len, words)) + len(words) - 1
+        return length, segment[-1].isspace()
+    
     def _identify_content_issues(self, content: str, metrics: Dict) -> List[str]:
         """Identify content quality issues."""
         issues = []
@@ -108,10 +384,7 @@ class ContentQualityValidator:
             issues.append("No documentation keywords found")
         
         # Check for empty or mostly empty content
-        text_content = re.sub(r'<[^>]+>', ' ', content)
-        text_content = re.sub(r'\s+', ' ', text_content).strip()
-        
-        if len(text_content) < 200:
+        if metrics['text_length'] < self.quality_thresholds['min_text_length']:
             issues.append("Very little actual text content")
         
         return issues
@@ -136,6 +409,1129 @@ class ContentQualityValidator:
         # Cap at 0-100 range
         return max(0, min(100, score))
 
+class SimpleSelector:
+    """One compound CSS selector: an optional tag plus #id, .class and [attr] / [attr=value] parts.
+    
+    This covers the forms used in site pattern files (e.g. "main[role='main']", ".content",
+    "#menu"); combinators and pseudo-classes are not supported.
+    """
+    
+    TAG_RE = re.compile(r'\*|[a-zA-Z][\w-]*')
+    PART_RE = re.compile(r'''([#.])([\w-]+)|\[\s*([\w-]+)\s*(?:=\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]*))\s*)?\]''')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.tag = None
+        self.element_id = None
+        self.classes = []
+        self.attributes = []  # (name, value or None for presence)
+        
+        position = 0
+        match = self.TAG_RE.match(text)
+        if match:
+            self.tag = None if match.group(0) == '*' else match.group(0).lower()
+            position = match.end()
+        
+        while position < len(text):
+            match = self.PART_RE.match(text, position)
+            if not match:
+                raise ValueError(f"Unsupported selector: {text}")
+            if match.group(1) == '#':
+                self.element_id = match.group(2)
+            elif match.group(1) == '.':
+                self.classes.append(match.group(2))
+            else:
+                value = next((group for group in match.group(4, 5, 6) if group is not None), None)
+                self.attributes.append((match.group(3).lower(), value))
+            position = match.end()
+        
+        if not (self.tag or self.element_id or self.classes or self.attributes):
+            raise ValueError(f"Empty selector: {text}")
+    
+    @classmethod
+    def parse_list(cls, text: str) -> List['SimpleSelector']:
+        """Parse a comma-separated selector list, skipping selectors that are not supported."""
+        selectors = []
+        for part in (text or '').split(','):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                selectors.append(cls(part))
+            except ValueError as e:
+                logger.debug(str(e))
+        return selectors
+    
+    def matches(self, tag: str, attributes: Dict[str, str]) -> bool:
+        """Check an element (lowercase tag, attribute dict) against this selector."""
+        if self.tag and tag != self.tag:
+            return False
+        if self.element_id and attributes.get('id') != self.element_id:
+            return False
+        if self.classes:
+            element_classes = (attributes.get('class') or '').split()
+            if any(name not in element_classes for name in self.classes):
+                return False
+        for name, value in self.attributes:
+            if name not in attributes or (value is not None and attributes[name] != value):
+                return False
+        return True
+
+class MainContentExtractor(HTMLParser):
+    """Single-pass extraction of the main-content subtree selected by site pattern selectors.
+    
+    Every selector captures its first matching element that holds at least min_text_length
+    characters of text; selectors earlier in the list win. Elements matching an exclude
+    selector (navigation) are dropped from the captured HTML.
+    """
+    
+    VOID_ELEMENTS = {
+        'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+        'link', 'meta', 'param', 'source', 'track', 'wbr'
+    }
+    
+    def __init__(self, selectors: List[SimpleSelector], exclude_selectors: List[SimpleSelector] = None,
+                 min_text_length: int = 200):
+        super().__init__(convert_charrefs=False)
+        self.selectors = selectors
+        self.exclude_selectors = exclude_selectors or []
+        self.min_text_length = min_text_length
+        self._stack = []  # Open element tags
+        self._open_counts = {}  # tag -> number of open elements, for constant-time end tag lookup
+        self._captures = [None] * len(selectors)  # Active capture per selector
+        self._results = [None] * len(selectors)
+    
+    def extract(self, html_content: str) -> Optional[str]:
+        """Return the HTML of the best matching main-content element, or None."""
+        self.feed(html_content)
+        self.close()
+        return next((result for result in self._results if result is not None), None)
+    
+    def close(self):
+        super().close()
+        # Elements left open at the end of the document end there
+        while self._stack:
+            self._pop_element()
+    
+    def handle_starttag(self, tag: str, attrs):
+        self._start_element(tag, attrs, self.get_starttag_text(), tag in self.VOID_ELEMENTS)
+    
+    def handle_startendtag(self, tag: str, attrs):
+        self._start_element(tag, attrs, self.get_starttag_text(), True)
+    
+    def handle_endtag(self, tag: str):
+        if not self._open_counts.get(tag):
+            return  # Stray end tag
+        while self._pop_element() != tag:
+            pass
+    
+    def handle_data(self, data: str):
+        text_length = len(data.strip())
+        for capture in self._captures:
+            if capture and capture['skip_depth'] is None:
+                capture['parts'].append(data)
+                capture['text_length'] += text_length
+    
+    def handle_entityref(self, name: str):
+        self._append_raw(f'&{name};')
+    
+    def handle_charref(self, name: str):
+        self._append_raw(f'&#{name};')
+    
+    def _append_raw(self, text: str):
+        for capture in self._captures:
+            if capture and capture['skip_depth'] is None:
+                capture['parts'].append(text)
+                capture['text_length'] += 1
+    
+    def _start_element(self, tag: str, attrs, raw: str, void: bool):
+        attributes = {name: value or '' for name, value in attrs}
+        depth = len(self._stack)
+        excluded = None
+        
+        for capture in self._captures:
+            if not capture or capture['skip_depth'] is not None:
+                continue
+            if excluded is None:
+                excluded = any(selector.matches(tag, attributes) for selector in self.exclude_selectors)
+            if not excluded:
+                capture['parts'].append(raw)
+            elif not void:
+                capture['skip_depth'] = depth
+        
+        for i, selector in enumerate(self.selectors):
+            if self._results[i] is None and self._captures[i] is None and not void \
+                    and selector.matches(tag, attributes):
+                self._captures[i] = {'depth': depth, 'parts': [raw], 'text_length': 0, 'skip_depth': None}
+        
+        if not void:
+            self._stack.append(tag)
+            self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+    
+    def _pop_element(self) -> str:
+        """Close the innermost open element and finish captures rooted at it."""
+        tag = self._stack.pop()
+        self._open_counts[tag] -= 1
+        depth = len(self._stack)
+        
+        for i, capture in enumerate(self._captures):
+            if not capture:
+                continue
+            if capture['skip_depth'] is None:
+                capture['parts'].append(f'</{tag}>')
+            elif capture['skip_depth'] == depth:
+                capture['skip_depth'] = None
+            
+            if capture['depth'] == depth:
+                # Too little text (e.g. a small ".content" box): wait for the next match
+                if capture['text_length'] >= self.min_text_length:
+                    self._results[i] = ''.join(capture['parts'])
+                self._captures[i] = None
+        
+        return tag
+
+class HttpResponse:
+    """Response returned by the in-process HTTP client."""
+    
+    def __init__(self, url: str, status: int, reason: str, headers: Dict[str, str], body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.from_cache = False
+    
+    @property
+    def ok(self) -> bool:
+        """True for 2xx responses."""
+        return 200 <= self.status < 300
+    
+    def text(self) -> str:
+        """Decode the body using the charset from Content-Type (UTF-8 fallback)."""
+        charset = 'utf-8'
+        match = re.search(r'charset=["\']?([\w.:-]+)', self.headers.get('content-type', ''), re.IGNORECASE)
+        if match:
+            charset = match.group(1)
+        try:
+            return self.body.decode(charset, errors='replace')
+        except LookupError:
+            return self.body.decode('utf-8', errors='replace')
+
+class HttpConnectionPool:
+    """Thread-safe pool of keep-alive HTTP(S) connections keyed by host."""
+    
+    REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+    READ_CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, max_idle_per_host: int = 4, max_redirects: int = 10):
+        self.max_idle_per_host = max_idle_per_host
+        self.max_redirects = max_redirects
+        self.ssl_context = ssl.create_default_context()
+        self._idle = {}  # (scheme, host, port) -> [HTTPConnection, ...]
+        self._lock = threading.Lock()
+    
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: float = 60, follow_redirects: bool = True,
+                url_headers: Optional[Callable[[str], Dict[str, str]]] = None) -> HttpResponse:
+        """Perform a request, following redirects and decoding gzip/deflate bodies.
+        
+        timeout bounds the whole request, redirects and body included (like curl's
+        --max-time), so a server trickling bytes cannot hold it open indefinitely.
+        url_headers, when given, returns extra headers for each URL actually requested,
+        so per-URL headers such as cache validators are not carried across redirects.
+        """
+        headers = dict(headers or {})
+        deadline = time.monotonic() + timeout
+        
+        for _ in range(self.max_redirects + 1):
+            hop_headers = {**headers, **url_headers(url)} if url_headers else headers
+            response = self._request_once(method, url, hop_headers, deadline)
+            location = response.headers.get('location')
+            if not (follow_redirects and response.status in self.REDIRECT_STATUSES and location):
+                return response
+            
+            url = urljoin(url, location)
+            if response.status == 303 and method != 'HEAD':
+                method = 'GET'
+        
+        raise http.client.HTTPException(f"Too many redirects for {url}")
+    
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+    
+    @staticmethod
+    def _remaining(deadline: float, url: str) -> float:
+        """Seconds left before the request deadline; raises socket.timeout once it has passed."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout(f"Request deadline exceeded for {url}")
+        return remaining
+    
+    def _request_once(self, method: str, url: str, headers: Dict[str, str], deadline: float) -> HttpResponse:
+        """Send a single request over a pooled connection, giving up at the deadline."""
+        parsed = urlparse(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        
+        host = parsed.hostname or ''
+        port = parsed.port or (443 if scheme == 'https' else 80)
+        key = (scheme, host, port)
+        
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        
+        proxy = self._get_proxy(scheme, host)
+        if proxy and scheme == 'http':
+            path = url  # Plain HTTP proxies expect the absolute URL
+        
+        request_headers = {'Host': parsed.netloc.rsplit('@', 1)[-1]}
+        request_headers.update(headers)
+        
+        # A reused keep-alive connection may have been closed by the server;
+        # retry once on a fresh connection in that case.
+        for reused_attempt in (True, False):
+            conn, reused = self._acquire(key, proxy, self._remaining(deadline, url), allow_reuse=reused_attempt)
+            try:
+                conn.request(method, path, headers=request_headers)
+                if conn.sock is not None:
+                    conn.sock.settimeout(self._remaining(deadline, url))
+                raw = conn.getresponse()
+                
+                # Read in pieces so every socket operation gets only the time that is left
+                chunks = []
+                while True:
+                    if conn.sock is not None:
+                        conn.sock.settimeout(self._remaining(deadline, url))
+                    chunk = raw.read1(self.READ_CHUNK_SIZE)  # At most one socket read
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                body = b''.join(chunks)
+                raw.close()  # read1() leaves the response open once the body is drained
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                    BrokenPipeError, ConnectionResetError) as e:
+                conn.close()
+                if reused:
+                    logger.debug(f"Stale pooled connection to {host}, reconnecting: {str(e)}")
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            
+            response_headers = {name.lower(): value for name, value in raw.getheaders()}
+            if raw.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            
+            body = self._decode_body(body, response_headers.get('content-encoding', ''))
+            return HttpResponse(url, raw.status, raw.reason, response_headers, body)
+        
+        raise http.client.HTTPException(f"Could not connect to {host}")
+    
+    def _acquire(self, key: Tuple[str, str, int], proxy: Optional[Tuple[str, int]],
+                 timeout: float, allow_reuse: bool = True):
+        """Take an idle connection for the host or open a new one."""
+        if allow_reuse:
+            with self._lock:
+                idle = self._idle.get(key)
+                conn = idle.pop() if idle else None
+            if conn is not None:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        
+        scheme, host, port = key
+        connect_host, connect_port = proxy if proxy else (host, port)
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(connect_host, connect_port, timeout=timeout, context=self.ssl_context)
+            if proxy:
+                conn.set_tunnel(host, port)
+        else:
+            conn = http.client.HTTPConnection(connect_host, connect_port, timeout=timeout)
+        return conn, False
+    
+    def _release(self, key: Tuple[str, str, int], conn):
+        """Return a connection to the idle pool."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+    
+    def _get_proxy(self, scheme: str, host: str) -> Optional[Tuple[str, int]]:
+        """Return the proxy configured in the environment for this scheme, if any."""
+        proxy_url = getproxies().get(scheme)
+        if not proxy_url or proxy_bypass(host):
+            return None
+        parsed = urlparse(proxy_url if '://' in proxy_url else f'http://{proxy_url}')
+        return parsed.hostname, parsed.port or 8080
+    
+    @staticmethod
+    def _decode_body(body: bytes, content_encoding: str) -> bytes:
+        """Decode gzip/deflate content encodings in-process."""
+        for encoding in reversed([e.strip().lower() for e in content_encoding.split(',') if e.strip()]):
+            if encoding in ('gzip', 'x-gzip'):
+                body = gzip.decompress(body)
+            elif encoding == 'deflate':
+                try:
+                    body = zlib.decompress(body)
+                except zlib.error:
+                    body = zlib.decompress(body, -zlib.MAX_WBITS)  # Raw deflate stream
+            elif encoding != 'identity':
+                raise ValueError(f"Unsupported content encoding: {encoding}")
+        return body
+
+class FetchResult:
+    """Outcome of fetching one page: the body plus what later pipeline stages need."""
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.content = None  # Decoded page body, None if the fetch failed
+        self.main_content = None  # Main-content subtree picked by site pattern selectors, if any
+        self.quality = None  # Report from ContentQualityValidator for the document (see below)
+        self.status = None
+        self.headers = {}
+        self.from_cache = False
+        self.profile = None  # Fetch profile that produced the content
+        self.attempts = 0
+        self.elapsed = 0.0  # Wall time including retries and backoff, in seconds
+        self.error = None
+    
+    @property
+    def ok(self) -> bool:
+        """True when the fetch produced content."""
+        return self.content is not None
+    
+    @property
+    def document(self) -> Optional[str]:
+        """HTML for later stages: the main content when it was found, otherwise the full page."""
+        return self.main_content or self.content
+    
+    def summary(self) -> str:
+        """One-line instrumentation summary for logs."""
+        size = len(self.content) if self.content else 0
+        main = f" main={len(self.main_content)}" if self.main_content else ''
+        quality = f"{self.quality['completeness']}%" if self.quality else 'n/a'
+        source = 'cache' if self.from_cache else 'network'
+        return (f"{self.url}: status={self.status} size={size}{main} quality={quality} "
+                f"attempts={self.attempts} source={source} elapsed={self.elapsed:.2f}s")
+
+class DiskCache:
+    """Files in a directory listed in a JSON index, with LRU eviction to max_bytes.
+    
+    Several processes may share a cache directory. Each one saves the index under an
+    exclusive flock and merges its own changes into the on-disk index, so concurrent
+    runs never drop each other's entries (which would leave their files orphaned).
+    Subclasses add the key scheme and the get/put API on top of _read() and _write().
+    """
+    
+    name = 'cache'  # Used in log messages
+    
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / 'index.json'
+        self.lock_file = self.cache_dir / 'index.lock'
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None  # Loaded lazily: key -> entry
+        self._written = set()  # Keys stored since the last save
+        self._touched = set()  # Keys read (last_access updated) since the last save
+        self._removed = {}  # Keys dropped since the last save -> 'stored' time of the dropped entry
+    
+    def _is_expired(self, entry: Dict) -> bool:
+        """True if an entry should be treated as missing; entries never expire by default."""
+        return False
+    
+    def _read(self, key: str) -> Optional[Tuple[Dict, bytes]]:
+        """Return (entry, file contents) for a key and mark it as recently used."""
+        with self._lock:
+            entry = self._get_index().get(key)
+            if not entry:
+                return None
+            
+            if self._is_expired(entry):
+                self._remove(key)
+                self._save_index()
+                return None
+            
+            try:
+                data = (self.cache_dir / entry['file']).read_bytes()
+            except OSError:
+                # File went missing (evicted by another process); forget the entry
+                self._remove(key)
+                self._save_index()
+                return None
+            
+            entry['last_access'] = time.time()
+            self._touched.add(key)
+            self._save_index()
+            return entry, data
+    
+    def _write(self, key: str, filename: str, data: bytes, fields: Optional[Dict] = None):
+        """Write a file into the cache and index it under key with extra entry fields."""
+        with self._lock:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                atomic_write(self.cache_dir / filename, data)
+            except OSError as e:
+                logger.warning(f"Could not write {self.name} entry: {str(e)}")
+                return
+            
+            now = time.time()
+            entry = dict(fields or {})
+            entry.update({'file': filename, 'size': len(data), 'stored': now, 'last_access': now})
+            self._get_index()[key] = entry
+            self._removed.pop(key, None)
+            self._written.add(key)
+            self._save_index()
+    
+    def _remove(self, key: str):
+        """Drop an entry and its file (caller holds the lock)."""
+        entry = self._index.pop(key)
+        try:
+            (self.cache_dir / entry['file']).unlink()
+        except OSError:
+            pass
+        self._written.discard(key)
+        self._touched.discard(key)
+        self._removed[key] = entry.get('stored', 0)
+    
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until the cache fits in max_bytes."""
+        for key in [key for key, entry in self._index.items() if self._is_expired(entry)]:
+            self._remove(key)
+        
+        total = sum(entry.get('size', 0) for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1].get('last_access', 0)):
+            if total <= self.max_bytes:
+                break
+            total -= entry.get('size', 0)
+            self._remove(key)
+            logger.debug(f"Evicted {self.name} entry {key}")
+    
+    def _get_index(self) -> Dict:
+        """Load the cache index from disk on first use."""
+        if self._index is None:
+            self._index = self._load_index()
+        return self._index
+    
+    def _load_index(self) -> Dict:
+        """Read the on-disk index; a missing or corrupt index is empty."""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+    
+    def _merge_index(self):
+        """Fold this process's changes into the on-disk index (caller holds the file lock)."""
+        merged = self._load_index()
+        for key, stored in self._removed.items():
+            # Keep entries another process stored again after we dropped ours
+            if key in merged and merged[key].get('stored', 0) <= stored:
+                del merged[key]
+        for key in self._written:
+            theirs = merged.get(key)
+            if theirs is None or theirs.get('stored', 0) <= self._index[key].get('stored', 0):
+                merged[key] = self._index[key]
+        for key in self._touched - self._written:
+            # An entry missing on disk was evicted by another process; don't resurrect it
+            if key in merged:
+                merged[key]['last_access'] = max(merged[key].get('last_access', 0),
+                                                 self._index[key].get('last_access', 0))
+        self._index = merged
+    
+    def _save_index(self):
+        """Merge with the on-disk index, evict, and write it atomically (caller holds the lock)."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with exclusive_file_lock(self.lock_file):
+                self._merge_index()
+                self._evict()
+                self._written = set()
+                self._touched = set()
+                self._removed = {}
+                atomic_write(self.index_file, json.dumps(self._index).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not save {self.name} index: {str(e)}")
+
+class HttpResponseCache(DiskCache):
+    """On-disk HTTP response cache with ETag/Last-Modified validators and LRU eviction."""
+    
+    name = 'response cache'
+    
+    def __init__(self, cache_dir: Path, max_bytes: int = 200 * 1024 * 1024):
+        super().__init__(cache_dir, max_bytes)
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Return If-None-Match/If-Modified-Since headers for a cached URL."""
+        with self._lock:
+            entry = self._get_index().get(url)
+        if not entry:
+            return {}
+        
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def load(self, url: str) -> Optional[HttpResponse]:
+        """Return the cached response for a URL and mark it as recently used."""
+        found = self._read(url)
+        if not found:
+            return None
+        
+        entry, body = found
+        response = HttpResponse(url, 200, 'OK', dict(entry.get('headers', {})), body)
+        response.from_cache = True
+        return response
+    
+    def store(self, url: str, response: HttpResponse):
+        """Store a successful response if it carries validators."""
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        if not response.ok or not (etag or last_modified):
+            return
+        
+        filename = hashlib.sha256(url.encode('utf-8')).hexdigest() + '.body'
+        kept_headers = {name: value for name, value in response.headers.items()
+                        if name in ('content-type', 'etag', 'last-modified')}
+        self._write(url, filename, response.body,
+                    {'etag': etag, 'last_modified': last_modified, 'headers': kept_headers})
+
+class ConversionCache(DiskCache):
+    """Content-addressed cache of converted Markdown with LRU eviction.
+    
+    Entries are keyed by a hash of the HTML, the base URL and the converter version, so
+    unchanged pages skip conversion and a converter upgrade invalidates everything.
+    """
+    
+    name = 'conversion cache'
+    
+    def __init__(self, cache_dir: Path, max_bytes: int = 100 * 1024 * 1024):
+        super().__init__(cache_dir, max_bytes)
+    
+    @staticmethod
+    def make_key(html_content: str, base_url: str, converter_version: str) -> str:
+        """Return the cache key for converting html_content with a given converter."""
+        digest = hashlib.sha256()
+        for part in (converter_version, base_url, html_content):
+            digest.update(part.encode('utf-8', errors='replace'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return cached Markdown for a key and mark it as recently used."""
+        found = self._read(key)
+        return found[1].decode('utf-8') if found else None
+    
+    def put(self, key: str, markdown_content: str):
+        """Store converted Markdown under a key."""
+        self._write(key, key + '.md', markdown_content.encode('utf-8'))
+
+class AgentOutputCache(DiskCache):
+    """Persistent memo of Technical Writer agent output with age and size eviction.
+    
+    Entries are keyed by a hash of the Markdown, library name, content type and prompt
+    template; entries older than max_age seconds are treated as missing.
+    """
+    
+    name = 'agent memo'
+    
+    def __init__(self, cache_dir: Path, max_bytes: int = 100 * 1024 * 1024, max_age: float = 30 * 86400):
+        super().__init__(cache_dir, max_bytes)
+        self.max_age = max_age
+    
+    @staticmethod
+    def make_key(markdown_content: str, library_name: str, content_type: str, prompt_template: str) -> str:
+        """Return the memo key for organizing markdown_content with a given prompt."""
+        digest = hashlib.sha256()
+        for part in (prompt_template, library_name, content_type, markdown_content):
+            digest.update(part.encode('utf-8', errors='replace'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return stored agent output for a key unless it has expired."""
+        found = self._read(key)
+        return found[1].decode('utf-8') if found else None
+    
+    def put(self, key: str, organized_content: str):
+        """Store agent output under a key."""
+        self._write(key, key + '.md', organized_content.encode('utf-8'))
+    
+    def _is_expired(self, entry: Dict) -> bool:
+        """Entries older than max_age are dropped on read and on eviction."""
+        return time.time() - entry.get('stored', 0) > self.max_age
+
+class DiscoveryCache:
+    """Persistent library -> documentation URL index with a negative cache for failed candidates.
+    
+    Saving re-reads the file under an exclusive flock and merges this process's changes
+    into it, so concurrent runs keep each other's entries.
+    """
+    
+    def __init__(self, cache_file: Path, positive_ttl: float = 7 * 86400, negative_ttl: float = 86400):
+        self.cache_file = Path(cache_file)
+        self.lock_file = self.cache_file.with_name(self.cache_file.name + '.lock')
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._data = None  # Loaded lazily: {'libraries': {...}, 'failed_urls': {...}}
+        # Changes since the last save, merged into the file under its flock
+        self._stored = set()  # Library names stored
+        self._removed = {}  # Library name -> when its entry was invalidated
+        self._marked = set()  # URLs marked failed
+        self._cleared = {}  # URL -> when its failure was cleared
+    
+    def get_urls(self, library_name: str) -> Optional[List[str]]:
+        """Return cached working URLs for a library if the entry is still fresh."""
+        with self._lock:
+            entry = self._get_data()['libraries'].get(library_name.lower())
+        if entry and time.time() - entry.get('stored', 0) < self.positive_ttl and entry.get('urls'):
+            return list(entry['urls'])
+        return None
+    
+    def store_urls(self, library_name: str, urls: List[str]):
+        """Remember the working URLs discovered for a library."""
+        with self._lock:
+            data = self._get_data()
+            now = time.time()
+            name = library_name.lower()
+            data['libraries'][name] = {'urls': list(urls), 'stored': now}
+            self._stored.add(name)
+            self._removed.pop(name, None)
+            for url in urls:
+                data['failed_urls'].pop(url, None)
+                self._marked.discard(url)
+                self._cleared[url] = now
+            self._save()
+    
+    def is_known_failure(self, url: str) -> bool:
+        """True if the URL failed recently enough to skip probing it."""
+        with self._lock:
+            failed_at = self._get_data()['failed_urls'].get(url)
+        return failed_at is not None and time.time() - failed_at < self.negative_ttl
+    
+    def mark_failed(self, url: str, save: bool = False):
+        """Record a candidate URL that 404'd or timed out."""
+        with self._lock:
+            self._get_data()['failed_urls'][url] = time.time()
+            self._marked.add(url)
+            self._cleared.pop(url, None)
+            if save:
+                self._save()
+    
+    def invalidate_url(self, url: str):
+        """Drop every library entry that relies on a URL which has started failing."""
+        with self._lock:
+            data = self._get_data()
+            stale = [name for name, entry in data['libraries'].items() if url in entry.get('urls', [])]
+            now = time.time()
+            for name in stale:
+                del data['libraries'][name]
+                self._stored.discard(name)
+                self._removed[name] = now
+                logger.info(f"Invalidated cached discovery for {name}: {url} is failing")
+            data['failed_urls'][url] = now
+            self._marked.add(url)
+            self._cleared.pop(url, None)
+            self._save()
+    
+    def save(self):
+        """Persist pending changes, pruning expired negative entries."""
+        with self._lock:
+            self._save()
+    
+    def _get_data(self) -> Dict:
+        """Load the cache file on first use."""
+        if self._data is None:
+            self._data = self._read_file()
+        return self._data
+    
+    def _read_file(self) -> Dict:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault('libraries', {})
+        data.setdefault('failed_urls', {})
+        return data
+    
+    def _merge(self, data: Dict) -> Dict:
+        """Fold this process's changes into data read from the file."""
+        libraries = data['libraries']
+        for name, removed_at in self._removed.items():
+            # Keep entries another process stored again after we invalidated ours
+            if name in libraries and libraries[name].get('stored', 0) <= removed_at:
+                del libraries[name]
+        for name in self._stored:
+            ours = self._data['libraries'].get(name)
+            theirs = libraries.get(name)
+            if ours and (theirs is None or theirs.get('stored', 0) <= ours['stored']):
+                libraries[name] = ours
+        
+        failed = data['failed_urls']
+        for url in self._marked:
+            if url in self._data['failed_urls']:
+                failed[url] = max(failed.get(url, 0), self._data['failed_urls'][url])
+        for url, cleared_at in self._cleared.items():
+            if url in failed and failed[url] <= cleared_at:
+                del failed[url]
+        return data
+    
+    def _save(self):
+        """Merge with the cache file and write it atomically (caller holds the lock)."""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with exclusive_file_lock(self.lock_file):
+                self._data = self._merge(self._read_file())
+                now = time.time()
+                failed = self._data['failed_urls']
+                for url in [u for u, failed_at in failed.items() if now - failed_at >= self.negative_ttl]:
+                    del failed[url]
+                atomic_write(self.cache_file, json.dumps(self._data, indent=2).encode('utf-8'))
+                self._stored = set()
+                self._removed = {}
+                self._marked = set()
+                self._cleared = {}
+        except OSError as e:
+            logger.warning(f"Could not save discovery cache: {str(e)}")
+
+class DomainRateLimiter:
+    """Per-domain token-bucket rate limiter whose state is shared across threads and processes.
+    
+    Bucket state lives in one small file per domain under state_dir. Updates are
+    serialized with an exclusive flock, so every worker of a batch run (threads or
+    subprocesses) draws from the same bucket. Requests to unrelated domains never wait
+    on each other.
+    """
+    
+    def __init__(self, state_dir: Path, delay: float = 1.0, burst: int = 1):
+        self.state_dir = Path(state_dir)
+        self.delay = delay  # Seconds per token, i.e. the steady-state spacing per domain
+        self.burst = max(1, burst)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._local_state = {}  # Used when file locking is unavailable
+    
+    def acquire(self, domain: str, abort: Optional[threading.Event] = None):
+        """Block until a request to the domain is allowed, or until abort is set."""
+        if self.delay <= 0:
+            return
+        
+        wait = self._reserve(domain)
+        if wait > 0:
+            logger.debug(f"Rate limiting {domain}: waiting {wait:.2f}s")
+            if abort:
+                abort.wait(wait)
+            else:
+                time.sleep(wait)
+    
+    def _reserve(self, domain: str) -> float:
+        """Take a token (possibly going into debt) and return how long to wait for it."""
+        with self._domain_lock(domain):
+            if fcntl is None:
+                state = self._local_state.get(domain)
+                state = self._take_token(state)
+                self._local_state[domain] = state
+                return state['wait']
+            
+            try:
+                self.state_dir.mkdir(parents=True, exist_ok=True)
+                state_file = self.state_dir / f"{re.sub(r'[^A-Za-z0-9._-]', '_', domain)}.json"
+                with open(state_file, 'a+', encoding='utf-8') as f:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                    try:
+                        f.seek(0)
+                        try:
+                            state = json.loads(f.read() or 'null')
+                        except ValueError:
+                            state = None
+                        state = self._take_token(state)
+                        f.seek(0)
+                        f.truncate()
+                        f.write(json.dumps({'tokens': state['tokens'], 'updated': state['updated']}))
+                        f.flush()
+                    finally:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                return state['wait']
+            
+            except OSError as e:
+                logger.warning(f"Shared rate limit state unavailable for {domain}, using local state: {str(e)}")
+                state = self._take_token(self._local_state.get(domain))
+                self._local_state[domain] = state
+                return state['wait']
+    
+    def _take_token(self, state: Optional[Dict]) -> Dict:
+        """Refill the bucket for elapsed time and take one token."""
+        now = time.time()
+        if not state:
+            state = {'tokens': float(self.burst), 'updated': now}
+        
+        elapsed = max(0.0, now - state['updated'])
+        tokens = min(float(self.burst), state['tokens'] + elapsed / self.delay) - 1
+        
+        # A negative balance is a reservation: the caller sleeps until its token accrues
+        return {'tokens': tokens, 'updated': now, 'wait': max(0.0, -tokens * self.delay)}
+    
+    def _domain_lock(self, domain: str) -> threading.Lock:
+        """Return the in-process lock for a domain."""
+        with self._locks_guard:
+            if domain not in self._locks:
+                self._locks[domain] = threading.Lock()
+            return self._locks[domain]
+
+class AsyncFetchEngine:
+    """Runs blocking URL checks concurrently on asyncio with global and per-host caps.
+    
+    Used for discovery probes; page fetches run on the page pipeline's fetch stage.
+    """
+    
+    def __init__(self, max_concurrency: int = 8, per_host_limit: int = 2):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+    
+    def first_matches(self, urls: List[str], check_func, quota: int) -> List[str]:
+        """Return the first `quota` URLs (in priority order) for which check_func(url, abort) is true.
+        
+        abort is a threading.Event set once the answer is settled; checks still queued or
+        running should give up when they see it, as their results are ignored.
+        """
+        if not urls or quota <= 0:
+            return []
+        return asyncio.run(self.gather_first(urls, check_func, quota))
+    
+    async def gather_first(self, urls: List[str], check_func, quota: int) -> List[str]:
+        """Coroutine form of first_matches(); cancels outstanding checks once the quota is settled."""
+        abort = threading.Event()
+        run_one, executor = self._create_runner(check_func, abort)
+        tasks = [asyncio.ensure_future(run_one(url)) for url in urls]
+        outcomes = [None] * len(urls)  # None = pending, otherwise bool
+        
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = tasks.index(task)
+                    outcomes[index] = bool(not task.exception() and task.result())
+                
+                # The answer is final once the resolved prefix already holds `quota` matches;
+                # later-priority URLs can no longer displace them.
+                matches = 0
+                for outcome in outcomes:
+                    if outcome is None:
+                        break
+                    matches += outcome
+                if matches >= quota:
+                    break
+        finally:
+            # Checks already on executor threads cannot be cancelled; tell them to stop early
+            abort.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        cancelled = sum(1 for outcome in outcomes if outcome is None)
+        if cancelled:
+            logger.debug(f"Cancelled {cancelled} outstanding checks after reaching quota")
+        
+        return [url for url, outcome in zip(urls, outcomes) if outcome][:quota]
+    
+    def _create_runner(self, func, abort: threading.Event):
+        """Build a coroutine that runs func(url, abort) under the concurrency caps, plus its executor."""
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        global_slots = asyncio.Semaphore(self.max_concurrency)
+        host_slots = {}
+        
+        async def run_one(url: str):
+            host = urlparse(url).netloc.lower()
+            if host not in host_slots:
+                host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+            
+            async with host_slots[host], global_slots:
+                if abort.is_set():
+                    return False
+                return await loop.run_in_executor(executor, func, url, abort)
+        
+        return run_one, executor
+
+class AgentPool:
+    """Bounded pool for Technical Writer agent calls, shared by every page of a run.
+    
+    Calls queue on a pool of `width` threads, so fetching and conversion of later pages
+    overlap with agent work on earlier ones. Each `claude` process additionally holds
+    one of `global_limit` slots: flock'd slot files under slot_dir that every docs-fetch
+    process (and batch worker) draws from, so parallel runs cannot oversubscribe the CLI.
+    """
+    
+    def __init__(self, slot_dir: Path, width: int = 2, global_limit: int = 4, poll_interval: float = 0.5):
+        self.slot_dir = Path(slot_dir)
+        self.width = max(1, width)
+        self.global_limit = max(1, global_limit)
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._local_slots = threading.BoundedSemaphore(self.global_limit)  # Used when file locking is unavailable
+    
+    def submit(self, func, *args) -> Future:
+        """Queue func(*args) on the pool and return its future."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.width, thread_name_prefix='agent')
+            return self._executor.submit(func, *args)
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads once queued calls have finished."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+    
+    @contextmanager
+    def slot(self):
+        """Hold one of the global agent slots for the duration of the block."""
+        handle = self._acquire_slot()
+        try:
+            yield
+        finally:
+            if handle is None:
+                self._local_slots.release()
+            else:
+                handle.close()  # Closing the file drops its flock
+    
+    def _acquire_slot(self):
+        """Block until a slot is free; returns the open slot file, or None for a local slot."""
+        if fcntl is None:
+            self._local_slots.acquire()
+            return None
+        
+        waited = False
+        while True:
+            for index in range(self.global_limit):
+                try:
+                    self.slot_dir.mkdir(parents=True, exist_ok=True)
+                    handle = open(self.slot_dir / f"slot-{index}.lock", 'a')
+                except OSError as e:
+                    logger.warning(f"Shared agent slots unavailable, limiting this process only: {str(e)}")
+                    self._local_slots.acquire()
+                    return None
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return handle
+                except OSError:
+                    handle.close()
+            if not waited:
+                logger.info(f"All {self.global_limit} agent slots busy, waiting")
+                waited = True
+            time.sleep(self.poll_interval)
+
+class StagedPipeline:
+    """Runs items through a chain of stages connected by bounded queues.
+    
+    Each stage has its own worker threads. A stage function takes an item and returns the
+    item for the next stage, or None to drop it. Queues hold at most queue_size items, so
+    a slow stage blocks the workers feeding it (backpressure) instead of letting work
+    pile up in memory. run() returns the last stage's outputs in completion order.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, stages: List[Tuple[str, Callable, int]], queue_size: int = 2):
+        self.stages = [(name, func, max(1, workers)) for name, func, workers in stages]
+        self.queue_size = max(1, queue_size)
+        self.stats = {}  # stage name -> items, busy seconds, seconds blocked on the next queue
+        self._lock = threading.Lock()
+    
+    def run(self, items: Iterable) -> List:
+        """Feed items through every stage and wait for the pipeline to drain."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = [workers for _, _, workers in self.stages]
+        results = []
+        self.stats = {name: {'items': 0, 'busy': 0.0, 'blocked': 0.0} for name, _, _ in self.stages}
+        
+        threads = []
+        for index, (name, _, workers) in enumerate(self.stages):
+            for n in range(workers):
+                thread = threading.Thread(target=self._work, args=(index, queues, remaining, results),
+                                          name=f"{name}-{n}", daemon=True)
+                thread.start()
+                threads.append(thread)
+        
+        try:
+            for item in items:
+                queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0][2]):
+                queues[0].put(self._DONE)
+            for thread in threads:
+                thread.join()
+        return results
+    
+    def summary(self) -> str:
+        """One-line per-stage timing summary for logs."""
+        return ', '.join(f"{name}: {stats['items']} items {stats['busy']:.2f}s busy {stats['blocked']:.2f}s blocked"
+                         for name, stats in self.stats.items())
+    
+    def _work(self, index: int, queues: List[queue.Queue], remaining: List[int], results: List):
+        """Worker loop for one stage; the last worker to finish closes the next stage's queue."""
+        name, func, _ = self.stages[index]
+        last_stage = index == len(self.stages) - 1
+        
+        while True:
+            item = queues[index].get()
+            if item is self._DONE:
+                break
+            
+            start = time.perf_counter()
+            try:
+                output = func(item)
+            except Exception as e:
+                logger.error(f"Pipeline stage {name} failed: {str(e)}")
+                output = None
+            finished = time.perf_counter()
+            
+            if output is not None:
+                if last_stage:
+                    with self._lock:
+                        results.append(output)
+                else:
+                    queues[index + 1].put(output)  # Blocks while the next stage is behind
+            
+            with self._lock:
+                stats = self.stats[name]
+                stats['items'] += 1
+                stats['busy'] += finished - start
+                stats['blocked'] += time.perf_counter() - finished
+        
+        with self._lock:
+            remaining[index] -= 1
+            stage_done = remaining[index] == 0
+        if stage_done and not last_stage:
+            for _ in range(self.stages[index + 1][2]):
+                queues[index + 1].put(self._DONE)
+
 class DocsFetcher:
     """Main class for fetching and processing documentation."""
     
@@ -144,32 +1540,119 @@ class DocsFetcher:
         self.user_agent = 'Mozilla/5.0 (compatible; Claude-Code-DocsFetch/1.0; +https://claude.ai/code)'
         
         # Rate limiting configuration
-        self.rate_limit_delay = 1.0  # seconds between requests
-        self.last_request_time = 0.0
+        self.rate_limit_delay = 1.0  # seconds between requests to the same domain
+        self.rate_limiter = DomainRateLimiter(self.base_dir / '.rate-limits', delay=self.rate_limit_delay)
+        
+        # Fetch concurrency: --async is shorthand for running --concurrency fetch workers;
+        # --per-host caps in-flight requests to one host in every mode (_host_slot)
+        self.async_fetch = False
+        self.max_concurrency = 8  # Fetch workers with --async, and discovery probes in flight
+        self.per_host_concurrency = 2  # Cap on in-flight requests per host
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        
+        # Page pipeline: fetch -> convert -> organize -> write, with bounded queues between
+        # stages (--fetch-workers N, --convert-workers N, --queue-size N; --async uses
+        # --concurrency fetch workers instead). Organize workers follow --agent-workers.
+        self.fetch_workers = 2
+        self.convert_workers = 1
+        self.pipeline_queue_size = 2
         
         # Error handling and retry configuration
         self.max_retries = 3
         self.retry_delays = [1, 3, 8]  # Exponential backoff in seconds
-        self.timeout_seconds = 90
-        
-        # Site patterns for common documentation sites
+        self.retryable_statuses = {408, 425, 429, 500, 502, 503, 504}
+        self.timeout_seconds = 60  # Socket timeout per request
+        
+        # Site patterns for common documentation sites. What is learned about domains
+        # without a user pattern file (fetch profile, success metadata) is kept in an
+        # overlay keyed by domain instead of copying the built-in pattern.
+        self.pattern_overlay_file = self.base_dir / '.site-patterns-learned.json'
+        # Serializes read-modify-write of the overlay and user pattern files across processes
+        self.pattern_lock_file = self.base_dir / '.site-patterns.lock'
         self.site_patterns = self._load_site_patterns()
         
-        # Technical Writer agent integration
+        # Technical Writer agent integration. Calls run on a bounded pool (--agent-workers N)
+        # and at most --agent-limit N agents run at once across all docs-fetch processes.
         self.enable_agent_integration = True
+        self.agent_workers = 2
+        self.agent_global_limit = 4
+        # Pages above --agent-chunk-size characters are organized in heading-bounded chunks,
+        # each with its own --agent-timeout; a failed chunk keeps its unorganized Markdown
+        # and the page is recorded as not organized, so --update processes it again
+        self.agent_chunk_chars = 40000
+        self.agent_timeout = 300
+        self._agent_pool = None
+        self._agent_pool_lock = threading.Lock()
         
         # Content quality validation
         self.quality_validator = ContentQualityValidator()
         
-        # Enhanced headers for better compatibility
-        self.enhanced_headers = [
-            '-H', f'User-Agent: {self.user_agent}',
-            '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            '-H', 'Accept-Language: en-US,en;q=0.9',
-            '-H', 'Accept-Encoding: gzip, deflate, br',
-            '-H', 'Connection: keep-alive',
-            '-H', 'Upgrade-Insecure-Requests: 1'
-        ]
+        # Markdown conversion runs in-process; --isolate-converter runs it in a subprocess instead
+        self.isolate_converter = False
+        
+        # Converted Markdown keyed by HTML, base URL and converter version (--no-cache bypasses it)
+        self.conversion_cache = ConversionCache(self.base_dir / '.conversion-cache')
+        self.use_conversion_cache = True
+        
+        # Memoized Technical Writer output keyed by Markdown, library, content type and
+        # prompt template (--no-cache bypasses it)
+        self.agent_cache = AgentOutputCache(self.base_dir / '.agent-cache')
+        self.use_agent_cache = True
+        
+        # In-process HTTP client with keep-alive connections per host
+        self.http_pool = HttpConnectionPool()
+        
+        # Conditional-request response cache (--no-cache disables, --refresh skips revalidation)
+        self.response_cache = HttpResponseCache(self.base_dir / '.http-cache')
+        self.use_response_cache = True
+        self.refresh_cache = False
+        
+        # Library -> working documentation URLs, plus recently failed candidates
+        self.discovery_cache = DiscoveryCache(self.base_dir / '.discovery-cache.json')
+        
+        # Header profiles: enhanced headers for better compatibility, simple as fallback
+        self.header_profiles = {
+            'enhanced': {
+                'User-Agent': self.user_agent,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1'
+            },
+            'simple': {
+                'User-Agent': self.user_agent,
+                'Connection': 'keep-alive'
+            }
+        }
+        
+        # Fetch profiles: header set, compression and timeout. The profile that worked
+        # for a domain is remembered in its site pattern and tried first next time.
+        self.fetch_profiles = {
+            'enhanced': {'headers': 'enhanced', 'compressed': True, 'timeout': self.timeout_seconds},
+            'simple': {'headers': 'simple', 'compressed': False, 'timeout': self.timeout_seconds}
+        }
+        # domain -> profile for domains without a pattern, until one is learned to store it in
+        self.pending_fetch_profiles = {
+            domain: fields['fetch_profile'] for domain, fields in self._load_pattern_overlay().items()
+            if domain not in self.site_patterns and fields.get('fetch_profile')
+        }
+        self.patterns_lock = threading.Lock()  # Guards site_patterns, pending_fetch_profiles and pattern files
+        
+        # Main-content extraction before validation and conversion (--full-page disables it).
+        # Domains without a pattern use the selectors of the 'default' site pattern.
+        self.extract_main_content = True
+        default_selectors = self.site_patterns.get('default', {}).get('selectors', {})
+        self.default_main_content_selectors = default_selectors.get('main_content', '')
+        self.default_navigation_selectors = default_selectors.get('navigation', '')
+        # Link-dense blocks left inside the main content are dropped during conversion
+        # (--keep-boilerplate disables it).
+        self.remove_boilerplate = True
+        
+        # Per-library record of source URLs and processed pages, used by --update.
+        # Each page's processed Markdown is written to the page store as soon as it is done.
+        self.fetch_state_file = '.fetch-state.json'
+        self.page_store_dir = '.pages'
         
         # JS-heavy sites that need special handling
         self.js_heavy_sites = {
@@ -177,6 +1660,20 @@ class DocsFetcher:
             'docs.svelte.dev', 'tailwindcss.com'
         }
     
+    def close(self):
+        """Release pooled HTTP connections and stop the agent pool's threads."""
+        self.http_pool.close()
+        with self._agent_pool_lock:
+            agent_pool, self._agent_pool = self._agent_pool, None
+        if agent_pool:
+            agent_pool.shutdown()
+    
+    def __enter__(self) -> 'DocsFetcher':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def _load_site_patterns(self) -> Dict:
         """Load site-specific parsing patterns from user-writable storage."""
         # Create user-writable patterns directory
@@ -190,6 +1687,7 @@ class DocsFetcher:
         patterns.update(builtin_patterns)
         
         # Load user patterns (override built-in ones)
+        user_domains = set()
         for pattern_file in user_patterns_dir.glob('*.json'):
             try:
                 with open(pattern_file, 'r', encoding='utf-8') as f:
@@ -199,6 +1697,7 @@ class DocsFetcher:
                     # Validate and update pattern
                     if self._validate_pattern(user_pattern):
                         patterns[domain] = user_pattern
+                        user_domains.add(domain)
                         logger.info(f"Loaded user pattern for {domain}")
                     else:
                         logger.warning(f"Invalid user pattern in {pattern_file}, skipping")
@@ -206,8 +1705,56 @@ class DocsFetcher:
             except Exception as e:
                 logger.error(f"Error loading pattern from {pattern_file}: {str(e)}")
         
+        # Apply learned fields to built-in patterns; user pattern files carry their own
+        for domain, fields in self._load_pattern_overlay().items():
+            if domain in patterns and domain not in user_domains:
+                patterns[domain] = self._apply_overlay(patterns[domain], fields)
+        
         return patterns
     
+    @staticmethod
+    def _apply_overlay(pattern: Dict, fields: Dict) -> Dict:
+        """Return a copy of pattern with learned overlay fields applied."""
+        pattern = dict(pattern)
+        if fields.get('fetch_profile'):
+            pattern['fetch_profile'] = fields['fetch_profile']
+        if fields.get('metadata'):
+            pattern['metadata'] = dict(pattern.get('metadata', {}), **fields['metadata'])
+        return pattern
+    
+    def _load_pattern_overlay(self) -> Dict:
+        """Load the learned fields recorded for domains without a user pattern file."""
+        try:
+            with open(self.pattern_overlay_file, 'r', encoding='utf-8') as f:
+                overlay = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return overlay if isinstance(overlay, dict) else {}
+    
+    def _update_pattern_overlay(self, domain: str, update: Callable[[Dict], Dict]) -> Dict:
+        """Replace a domain's learned fields in the overlay file with update(fields); returns them.
+        
+        The overlay is re-read and rewritten under the pattern flock, so concurrent runs
+        never lose each other's updates (caller holds patterns_lock).
+        """
+        with exclusive_file_lock(self.pattern_lock_file):
+            overlay = self._load_pattern_overlay()
+            fields = update(dict(overlay.get(domain, {})))
+            overlay[domain] = fields
+            atomic_write(self.pattern_overlay_file, json.dumps(overlay, indent=2, ensure_ascii=False).encode('utf-8'))
+        return fields
+    
+    def _update_pattern_file(self, pattern_file: Path, update: Callable[[Dict], Dict]) -> Dict:
+        """Replace a user pattern file's contents with update(pattern); returns the new pattern.
+        
+        Like the overlay, the file is re-read and written atomically under the pattern flock.
+        """
+        with exclusive_file_lock(self.pattern_lock_file):
+            with open(pattern_file, 'r', encoding='utf-8') as f:
+                pattern = update(json.load(f))
+            atomic_write(pattern_file, json.dumps(pattern, indent=2, ensure_ascii=False).encode('utf-8'))
+        return pattern
+    
     def _get_builtin_patterns(self) -> Dict:
         """Get built-in fallback patterns."""
         # Try to load from the static file first
@@ -251,8 +1798,8 @@ class DocsFetcher:
             },
             "default": {
                 "selectors": {
-                    "main_content": "main, .main, .content, .container, article, .document",
-                    "navigation": "nav, .nav, .sidebar, .toc",
+                    "main_content": "main, [role='main'], .main, .main-content, .content, .container, article, .document",
+                    "navigation": "nav, [role='navigation'], .nav, .sidebar, .toc",
                     "title": "h1, .title, .page-title"
                 },
                 "sections": ["docs", "guide", "api", "reference"],
@@ -278,21 +1825,73 @@ class DocsFetcher:
         return True
     
     def _save_learned_pattern(self, domain: str, pattern: Dict):
-        """Save a learned pattern to user-writable storage."""
+        """Save a learned pattern to user-writable storage (caller holds patterns_lock)."""
         try:
             user_patterns_dir = self.base_dir / '.site-patterns'
             user_patterns_dir.mkdir(parents=True, exist_ok=True)
             
             pattern_file = user_patterns_dir / f"{domain}.json"
             
-            with open(pattern_file, 'w', encoding='utf-8') as f:
-                json.dump(pattern, f, indent=2, ensure_ascii=False)
+            # Keep the fetch profile that already worked for this domain; it stays pending
+            # until the pattern that now holds it is safely on disk
+            if 'fetch_profile' not in pattern and domain in self.pending_fetch_profiles:
+                pattern['fetch_profile'] = self.pending_fetch_profiles[domain]
+            
+            with exclusive_file_lock(self.pattern_lock_file):
+                atomic_write(pattern_file, json.dumps(pattern, indent=2, ensure_ascii=False).encode('utf-8'))
+            self.pending_fetch_profiles.pop(domain, None)
             
             logger.info(f"Saved learned pattern for {domain}")
             
         except Exception as e:
             logger.error(f"Error saving pattern for {domain}: {str(e)}")
     
+    def _get_fetch_profile_order(self, url: str) -> List[Dict]:
+        """Return fetch profiles to try for a URL, starting with the one that last worked."""
+        if self._requires_enhanced_fetching(url):
+            order = [self.fetch_profiles['enhanced'], self.fetch_profiles['simple']]
+        else:
+            order = [self.fetch_profiles['simple']]
+        
+        domain = self._get_domain(url)
+        with self.patterns_lock:
+            learned = self.site_patterns.get(domain, {}).get('fetch_profile') or self.pending_fetch_profiles.get(domain)
+        if learned and learned.get('headers') in self.header_profiles:
+            order = [learned] + [profile for profile in order if profile['headers'] != learned['headers']]
+        
+        return order
+    
+    def _record_fetch_profile(self, domain: str, profile: Dict):
+        """Remember the fetch profile that succeeded for a domain.
+        
+        A user pattern file is updated in place; otherwise only the profile is written
+        to the overlay, never a copy of the built-in pattern.
+        """
+        with self.patterns_lock:
+            pattern = self.site_patterns.get(domain)
+            current = pattern.get('fetch_profile') if pattern is not None else self.pending_fetch_profiles.get(domain)
+            if current == profile:
+                return
+            
+            if pattern is None:
+                # No pattern yet; the profile moves into the pattern once one is learned
+                self.pending_fetch_profiles[domain] = dict(profile)
+            else:
+                self.site_patterns[domain] = dict(pattern, fetch_profile=dict(profile))
+            
+            try:
+                pattern_file = self.base_dir / '.site-patterns' / f"{domain}.json"
+                if pattern_file.exists():
+                    self._update_pattern_file(pattern_file, lambda stored: dict(stored, fetch_profile=dict(profile)))
+                else:
+                    self._update_pattern_overlay(domain, lambda fields: dict(fields, fetch_profile=dict(profile)))
+                
+                logger.info(f"Recorded fetch profile for {domain}: {profile['headers']} headers, "
+                            f"compressed={profile['compressed']}, timeout={profile['timeout']}s")
+            
+            except Exception as e:
+                logger.error(f"Error recording fetch profile for {domain}: {str(e)}")
+    
     def _discover_content_patterns(self, html_content: str, url: str) -> Dict:
         """Analyze HTML to discover content patterns."""
         from urllib.parse import urlparse
@@ -360,45 +1959,75 @@ class DocsFetcher:
         return pattern
     
     def _update_pattern_success(self, domain: str, success: bool):
-        """Update pattern success metrics."""
+        """Update pattern success metrics (caller holds patterns_lock).
+        
+        User pattern files are updated in place; built-in patterns keep their metrics
+        in the overlay. Domains without any pattern are not tracked.
+        """
         try:
             user_patterns_dir = self.base_dir / '.site-patterns'
             pattern_file = user_patterns_dir / f"{domain}.json"
             
             if pattern_file.exists():
-                with open(pattern_file, 'r', encoding='utf-8') as f:
-                    pattern = json.load(f)
-                
-                metadata = pattern.get('metadata', {})
-                
-                # Update usage count
-                metadata['usage_count'] = metadata.get('usage_count', 0) + 1
-                
-                # Update success rate using exponential moving average
-                current_rate = metadata.get('success_rate', 0.5)
-                alpha = 0.1  # Learning rate
-                new_rate = alpha * (1.0 if success else 0.0) + (1 - alpha) * current_rate
-                metadata['success_rate'] = round(new_rate, 3)
-                metadata['last_updated'] = time.strftime('%Y-%m-%d')
-                
-                pattern['metadata'] = metadata
-                
-                # Save updated pattern
-                with open(pattern_file, 'w', encoding='utf-8') as f:
-                    json.dump(pattern, f, indent=2, ensure_ascii=False)
-                
-                logger.info(f"Updated pattern success for {domain}: rate={new_rate:.3f}, count={metadata['usage_count']}")
+                pattern = self._update_pattern_file(pattern_file, lambda pattern: dict(
+                    pattern, metadata=self._advance_success_metadata(pattern.get('metadata', {}), success)))
+                metadata = pattern['metadata']
+            
+            elif domain in self.site_patterns:
+                # Start from the on-disk overlay so concurrent runs' counts are kept
+                builtin_metadata = self.site_patterns[domain].get('metadata', {})
+                fields = self._update_pattern_overlay(domain, lambda fields: dict(
+                    fields, metadata=self._advance_success_metadata(
+                        dict(builtin_metadata, **fields.get('metadata', {})), success)))
+                metadata = fields['metadata']
+                self.site_patterns[domain] = dict(self.site_patterns[domain], metadata=metadata)
+            
+            else:
+                return
+            
+            logger.info(f"Updated pattern success for {domain}: rate={metadata['success_rate']:.3f}, count={metadata['usage_count']}")
                 
         except Exception as e:
             logger.error(f"Error updating pattern success for {domain}: {str(e)}")
     
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting between requests."""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        if elapsed < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - elapsed)
-        self.last_request_time = time.time()
+    @staticmethod
+    def _advance_success_metadata(metadata: Dict, success: bool) -> Dict:
+        """Return metadata with the usage count and success rate updated for one more fetch."""
+        metadata = dict(metadata)
+        
+        # Update usage count
+        metadata['usage_count'] = metadata.get('usage_count', 0) + 1
+        
+        # Update success rate using exponential moving average
+        current_rate = metadata.get('success_rate', 0.5)
+        alpha = 0.1  # Learning rate
+        new_rate = alpha * (1.0 if success else 0.0) + (1 - alpha) * current_rate
+        metadata['success_rate'] = round(new_rate, 3)
+        metadata['last_updated'] = time.strftime('%Y-%m-%d')
+        return metadata
+    
+    def _extract_main_content(self, html_content: str, url: str) -> Optional[str]:
+        """Isolate the main-content subtree using the domain's site pattern selectors."""
+        if not self.extract_main_content or not html_content:
+            return None
+        
+        selectors = self.site_patterns.get(self._get_domain(url), {}).get('selectors', {})
+        main_selectors = SimpleSelector.parse_list(selectors.get('main_content') or self.default_main_content_selectors)
+        navigation_selectors = SimpleSelector.parse_list(selectors.get('navigation') or self.default_navigation_selectors)
+        if not main_selectors:
+            return None
+        
+        try:
+            extractor = MainContentExtractor(main_selectors, navigation_selectors,
+                                             self.quality_validator.quality_thresholds['min_text_length'])
+            return extractor.extract(html_content)
+        except Exception as e:
+            logger.warning(f"Main content extraction failed for {url}: {str(e)}")
+            return None
+    
+    def _enforce_rate_limit(self, url: str, abort: Optional[threading.Event] = None):
+        """Enforce per-domain rate limiting shared with other workers."""
+        self.rate_limiter.acquire(self._get_domain(url), abort)
     
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for safe filesystem storage."""
@@ -528,39 +2157,73 @@ class DocsFetcher:
             f"https://packagist.org/packages/{lib_lower}",
         ]
         
-        logger.info(f"Testing {len(common_patterns)} URL patterns...")
-        working_urls = []
+        if not self.refresh_cache:
+            cached_urls = self.discovery_cache.get_urls(library_name)
+            if cached_urls:
+                logger.info(f"Using cached discovery result for {library_name}")
+                return cached_urls
+            
+            # Skip candidates that recently 404'd or timed out
+            candidates = [url for url in common_patterns if not self.discovery_cache.is_known_failure(url)]
+            if len(candidates) < len(common_patterns):
+                logger.info(f"Skipping {len(common_patterns) - len(candidates)} recently failed URL patterns")
+            common_patterns = candidates
         
-        for i, url in enumerate(common_patterns):
-            try:
-                self._enforce_rate_limit()
-                logger.debug(f"Testing URL {i+1}/{len(common_patterns)}: {url}")
-                
-                # Use curl to test URL accessibility
-                result = subprocess.run([
-                    'curl', '-s', '-I', '--connect-timeout', '8', '--max-time', '15',
-                    '-H', f'User-Agent: {self.user_agent}', url
-                ], capture_output=True, text=True, timeout=20)
-                
-                if result.returncode == 0 and result.stdout:
-                    # Check for successful HTTP responses
-                    if any(status in result.stdout for status in ['200 OK', '301 ', '302 ', '303 ']):
-                        working_urls.append(url)
-                        logger.info(f"✅ Found working URL: {url}")
-                        if len(working_urls) >= 3:  # Limit to first 3 working URLs
-                            break
-                            
-            except (subprocess.SubprocessError, subprocess.TimeoutExpired) as e:
-                logger.debug(f"Failed to test {url}: {str(e)}")
-                continue
+        logger.info(f"Testing {len(common_patterns)} URL patterns...")
+        # Probe candidates concurrently across hosts; stop once the first 3 working URLs
+        # (in pattern priority order) are known
+        working_urls = self._create_fetch_engine().first_matches(common_patterns, self._probe_url, quota=3)
+        for url in working_urls:
+            logger.info(f"✅ Found working URL: {url}")
         
         if working_urls:
             logger.info(f"Discovered {len(working_urls)} working URLs for {library_name}")
+            self.discovery_cache.store_urls(library_name, working_urls)
         else:
             logger.warning(f"No working URLs found for {library_name} after testing {len(common_patterns)} patterns")
+            self.discovery_cache.save()
         
         return working_urls
     
+    def _probe_url(self, url: str, abort: Optional[threading.Event] = None) -> bool:
+        """Check URL accessibility with a HEAD request.
+        
+        Once abort is set the probe is skipped, and a result that arrives later is ignored.
+        """
+        aborted = abort.is_set if abort else lambda: False
+        try:
+            if aborted():
+                return False
+            self._enforce_rate_limit(url, abort)
+            if aborted():
+                return False
+            
+            # HEAD probe without following redirects; a redirect still means the URL exists
+            response = self.http_pool.request(
+                'HEAD', url, headers=self.header_profiles['simple'],
+                timeout=15, follow_redirects=False
+            )
+            if aborted():
+                return False
+            if response.status in (200, 301, 302, 303):
+                return True
+            if response.status in (404, 410):
+                self.discovery_cache.mark_failed(url)
+            return False
+        
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            logger.debug(f"Failed to test {url}: {str(e)}")
+            if not aborted():
+                self.discovery_cache.mark_failed(url)
+            return False
+    
+    def _create_fetch_engine(self) -> AsyncFetchEngine:
+        """Create a concurrent fetch engine from the current settings."""
+        return AsyncFetchEngine(
+            max_concurrency=self.max_concurrency,
+            per_host_limit=self.per_host_concurrency
+        )
+    
     def _requires_enhanced_fetching(self, url: str) -> bool:
         """Check if URL requires enhanced fetching strategies."""
         from urllib.parse import urlparse
@@ -571,9 +2234,21 @@ class DocsFetcher:
         
         return any(js_site in domain for js_site in self.js_heavy_sites)
     
-    def _fetch_with_retry(self, url: str, use_enhanced_headers: bool = True) -> Optional[str]:
-        """Fetch URL with retry logic and exponential backoff."""
+    def _fetch_with_retry(self, url: str, profile: Optional[Dict] = None,
+                          seen_hashes: Optional[set] = None,
+                          result: Optional[FetchResult] = None) -> FetchResult:
+        """Fetch URL with retry logic and exponential backoff.
+        
+        Transport failures (timeouts, connection errors, retryable HTTP statuses) are
+        retried. Low-quality content is only re-fetched while the server keeps returning
+        something new; once a body repeats, retrying cannot improve it. seen_hashes can
+        be shared between calls so a fallback pass also stops on repeated content.
+        Pass an existing FetchResult to accumulate attempts across fallback passes.
+        """
         last_error = None
+        profile = profile or self.fetch_profiles['simple']
+        seen_hashes = set() if seen_hashes is None else seen_hashes
+        result = result or FetchResult(url)
         
         for attempt in range(self.max_retries):
             try:
@@ -583,81 +2258,126 @@ class DocsFetcher:
                     time.sleep(delay)
                 
                 logger.info(f"Fetch attempt {attempt + 1}/{self.max_retries} for: {url}")
+                result.attempts += 1
                 
-                # Build curl command
-                cmd = ['curl', '-s', '-L', '--connect-timeout', '30', '--max-time', '60']
-                
-                if use_enhanced_headers:
-                    cmd.extend(self.enhanced_headers)
-                    cmd.append('--compressed')
-                else:
-                    cmd.extend(['-H', f'User-Agent: {self.user_agent}'])
-                
-                cmd.append(url)
-                
-                # Execute the request
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout_seconds)
+                response = self._http_get(url, profile)
+                result.status = response.status
+                content = response.text() if response.ok else ''
                 
-                if result.returncode == 0 and result.stdout.strip():
-                    content = result.stdout
+                if content.strip():
+                    body_hash = hashlib.sha256(response.body).hexdigest()
+                    repeated = body_hash in seen_hashes
+                    seen_hashes.add(body_hash)
                     
-                    # Validate content quality
-                    quality = self.quality_validator.validate_content_quality(content, url)
+                    # Validate the main content when the site's selectors find it
+                    main_content = self._extract_main_content(content, url)
+                    quality = self.quality_validator.validate_content_quality(main_content or content, url)
                     
-                    if quality['is_valid'] or attempt == self.max_retries - 1:
+                    if quality['is_valid'] or repeated or attempt == self.max_retries - 1:
                         if quality['is_valid']:
                             logger.info(f"Fetch successful (quality: {quality['completeness']}%)")
+                        elif repeated:
+                            logger.warning(f"Content unchanged since previous attempt, not retrying (issues: {quality['issues']})")
                         else:
                             logger.warning(f"Using low-quality content after all retries (issues: {quality['issues']})")
-                        return content
+                        result.content = content
+                        result.main_content = main_content
+                        result.quality = quality
+                        result.headers = response.headers
+                        result.from_cache = response.from_cache
+                        result.profile = profile
+                        result.error = None
+                        return result
                     else:
                         logger.warning(f"Content quality too low (attempt {attempt + 1}): {quality['issues']}")
                         continue
                         
                 else:
-                    last_error = f"curl failed with return code {result.returncode}: {result.stderr}"
+                    last_error = f"HTTP {response.status} {response.reason}" if not response.ok else "Empty response body"
                     logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
+                    if not response.ok and response.status not in self.retryable_statuses:
+                        break
                     
-            except subprocess.TimeoutExpired:
-                last_error = f"Request timed out after {self.timeout_seconds} seconds"
+            except socket.timeout:
+                last_error = f"Request timed out after {profile['timeout']} seconds"
                 logger.warning(f"Attempt {attempt + 1} timed out")
+            
+            except (OSError, http.client.HTTPException) as e:
+                last_error = f"Connection error: {str(e)}"
+                logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
                 
             except Exception as e:
                 last_error = f"Unexpected error: {str(e)}"
                 logger.error(f"Attempt {attempt + 1} failed with error: {last_error}")
         
-        logger.error(f"All {self.max_retries} attempts failed for {url}. Last error: {last_error}")
-        return None
+        logger.error(f"Fetch failed for {url} after {attempt + 1} attempt(s). Last error: {last_error}")
+        result.error = last_error
+        return result
     
-    def _enhanced_fetch(self, url: str) -> Optional[str]:
-        """Enhanced fetch with better headers and retry logic."""
-        # Try with enhanced headers first
-        content = self._fetch_with_retry(url, use_enhanced_headers=True)
-        
-        if content:
-            return content
-        
-        # Fallback to simple headers
-        logger.info("Enhanced headers failed, trying with simple headers")
-        return self._fetch_with_retry(url, use_enhanced_headers=False)
+    def _http_get(self, url: str, profile: Dict) -> HttpResponse:
+        """GET a URL with a fetch profile, revalidating against the response cache when possible."""
+        base_headers = dict(self.header_profiles[profile['headers']])
+        if profile.get('compressed'):
+            base_headers['Accept-Encoding'] = 'gzip, deflate'  # Decoded in-process; brotli needs a third-party codec
+        timeout = profile.get('timeout', self.timeout_seconds)
+        
+        cache = self.response_cache if self.use_response_cache else None
+        # Validators belong to the URL that served them, so they are looked up per redirect hop
+        validators = cache.conditional_headers if cache and not self.refresh_cache else None
+        
+        response = self.http_pool.request('GET', url, headers=base_headers, timeout=timeout,
+                                          url_headers=validators)
+        
+        if response.status == 304 and cache:
+            cached = cache.load(response.url)
+            if cached:
+                logger.info(f"Not modified, using cached response for: {response.url}")
+                return cached
+            # Cache entry vanished; fetch the full body unconditionally
+            response = self.http_pool.request('GET', url, headers=base_headers, timeout=timeout)
+        
+        if cache:
+            cache.store(response.url, response)
+        return response
     
-    def fetch_page_content(self, url: str) -> Optional[str]:
-        """Fetch content from a single URL with comprehensive error handling."""
+    def fetch_page(self, url: str) -> FetchResult:
+        """Fetch a single URL and return the body with its quality report and timing."""
+        result = FetchResult(url)
+        start = time.perf_counter()
+        
         try:
-            self._enforce_rate_limit()
+            self._enforce_rate_limit(url)
             logger.info(f"Fetching content from: {url}")
             
-            # Use enhanced fetching for all sites (includes retry logic)
-            if self._requires_enhanced_fetching(url):
-                logger.info(f"Using enhanced fetching for JS-heavy site: {url}")
-                return self._enhanced_fetch(url)
-            else:
-                logger.info(f"Using standard fetching with retry logic: {url}")
-                return self._fetch_with_retry(url, use_enhanced_headers=False)
+            # Start with the profile that worked for this domain before; JS-heavy sites
+            # default to enhanced headers with a simple-header fallback
+            profiles = self._get_fetch_profile_order(url)
+            seen_hashes = set()
+            
+            for i, profile in enumerate(profiles):
+                if i > 0:
+                    logger.info(f"{profiles[i - 1]['headers'].title()} headers failed, trying with {profile['headers']} headers")
+                else:
+                    logger.info(f"Using {profile['headers']} fetch profile with retry logic: {url}")
+                
+                self._fetch_with_retry(url, profile, seen_hashes=seen_hashes, result=result)
+                if result.ok:
+                    # Low-quality content is used but doesn't prove the profile works
+                    if result.quality and result.quality['is_valid']:
+                        self._record_fetch_profile(self._get_domain(url), profile)
+                    break
         
         except Exception as e:
             logger.error(f"Critical error fetching {url}: {str(e)}")
-            return None
+            result.error = str(e)
+        
+        result.elapsed = time.perf_counter() - start
+        logger.debug(f"Fetch result: {result.summary()}")
+        return result
+    
+    def fetch_page_content(self, url: str) -> Optional[str]:
+        """Fetch content from a single URL with comprehensive error handling."""
+        return self.fetch_page(url).content
     
     def parse_arguments(self, args_string: str) -> Tuple[str, Dict]:
         """Parse command line arguments from string."""
@@ -686,10 +2406,22 @@ class DocsFetcher:
         
         return library_name, options
     
-    def _call_technical_writer_agent(self, content: str, library_name: str, content_type: str) -> str:
-        """Call the Technical Writer agent to organize and structure content."""
+    def _call_technical_writer_agent(self, content: str, library_name: str, content_type: str) -> Tuple[str, bool]:
+        """Call the Technical Writer agent to organize and structure content.
+        
+        Returns (content, organized); organized is False when the agent failed or timed out
+        and the unorganized content is returned instead.
+        """
         if not self.enable_agent_integration:
-            return content
+            return content, True
+        
+        memo_key = None
+        if self.use_agent_cache:
+            memo_key = AgentOutputCache.make_key(content, library_name, content_type, TECHNICAL_WRITER_PROMPT)
+            memoized = self.agent_cache.get(memo_key)
+            if memoized is not None:
+                logger.info(f"Reusing memoized Technical Writer output for {content_type}")
+                return memoized, True
             
         try:
             logger.info(f"Calling Technical Writer agent for {content_type} content organization")
@@ -700,29 +2432,18 @@ class DocsFetcher:
                 temp_path = temp_file.name
             
             # Prepare the prompt for the Technical Writer agent
-            prompt = f"""Please review and organize this {content_type} documentation for the {library_name} library. 
-
-Structure the content to be AI-friendly with:
-1. Clear hierarchical headings
-2. Consistent formatting
-3. Proper code block formatting
-4. Logical flow and organization
-5. Remove any redundant navigation or promotional content
-6. Focus on technical content that helps developers
-
-The content should be optimized for Claude Code to understand and reference when helping developers.
-
-Original content is in: {temp_path}
-
-Please create well-structured, AI-optimized documentation."""
+            prompt = TECHNICAL_WRITER_PROMPT.format(
+                content_type=content_type, library_name=library_name, temp_path=temp_path
+            )
 
             # Call Claude Code with the technical-writer agent
-            result = subprocess.run([
-                'claude', 'task', 
-                '--subagent-type', 'technical-writer',
-                '--description', f'Organize {library_name} {content_type}',
-                '--prompt', prompt
-            ], capture_output=True, text=True, cwd='/workspace', timeout=300)
+            with self.get_agent_pool().slot():
+                result = subprocess.run([
+                    'claude', 'task', 
+                    '--subagent-type', 'technical-writer',
+                    '--description', f'Organize {library_name} {content_type}',
+                    '--prompt', prompt
+                ], capture_output=True, text=True, cwd='/workspace', timeout=self.agent_timeout)
             
             if result.returncode == 0:
                 logger.info("Technical Writer agent completed content organization")
@@ -730,17 +2451,22 @@ Please create well-structured, AI-optimized documentation."""
                 try:
                     with open(temp_path, 'r', encoding='utf-8') as f:
                         organized_content = f.read()
-                    return organized_content
+                    if memo_key and organized_content:
+                        self.agent_cache.put(memo_key, organized_content)
+                    return organized_content, True
                 except FileNotFoundError:
                     logger.warning("Agent output file not found, using original content")
-                    return content
+                    return content, False
             else:
                 logger.warning(f"Technical Writer agent failed: {result.stderr}")
-                return content
+                return content, False
                 
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Technical Writer agent timed out after {self.agent_timeout}s on {content_type}, using unorganized content")
+            return content, False
         except Exception as e:
             logger.error(f"Error calling Technical Writer agent: {str(e)}")
-            return content
+            return content, False
         finally:
             # Clean up temporary file
             try:
@@ -749,11 +2475,80 @@ Please create well-structured, AI-optimized documentation."""
             except:
                 pass
     
+    def _submit_organization(self, markdown_content: str, library_name: str, content_type: str) -> Tuple[List[Dict], List[Future]]:
+        """Queue agent organization of a page, split into chunks when it is large."""
+        if self.enable_agent_integration and len(markdown_content) > self.agent_chunk_chars:
+            chunks = split_markdown_chunks(markdown_content, self.agent_chunk_chars)
+        else:
+            chunks = [{'text': markdown_content, 'trail': [], 'level': 1}]
+        
+        if len(chunks) > 1:
+            logger.info(f"Organizing {content_type} in {len(chunks)} chunks")
+        
+        futures = []
+        for i, chunk in enumerate(chunks, 1):
+            chunk_type = content_type
+            if len(chunks) > 1:
+                chunk_type += f", part {i} of {len(chunks)}"
+                if chunk['trail']:
+                    chunk_type += f" ({' > '.join(chunk['trail'])})"
+            futures.append(self.get_agent_pool().submit(
+                self._call_technical_writer_agent, chunk['text'], library_name, chunk_type
+            ))
+        return chunks, futures
+    
+    def _collect_organization(self, chunks: List[Dict], futures: List[Future]) -> Tuple[str, bool]:
+        """Wait for a page's agent calls and merge the chunk outputs in order.
+        
+        Returns (markdown, organized); organized is False if any chunk's agent call failed.
+        """
+        results = [future.result() for future in futures]
+        outputs = [output for output, _ in results]
+        organized = all(ok for _, ok in results)
+        if len(outputs) == 1:
+            return outputs[0], organized
+        return merge_organized_chunks(chunks, outputs), organized
+    
+    def get_agent_pool(self) -> AgentPool:
+        """Return the agent pool for this run, creating it on first use."""
+        with self._agent_pool_lock:
+            if self._agent_pool is None:
+                self._agent_pool = AgentPool(self.base_dir / '.agent-slots', width=self.agent_workers,
+                                             global_limit=self.agent_global_limit)
+            return self._agent_pool
+    
     def _process_content_with_markdown_converter(self, html_content: str, base_url: str) -> str:
         """Process HTML content using the markdown converter."""
+        if self.isolate_converter:
+            return self._run_markdown_converter_subprocess(html_content, base_url)
+        
+        module = load_markdown_converter()
+        if module is None:
+            logger.warning("Falling back to running the markdown converter in a subprocess")
+            return self._run_markdown_converter_subprocess(html_content, base_url)
+        
+        try:
+            converter = module.MarkdownConverter(remove_boilerplate=self.remove_boilerplate)
+            cache_key = None
+            if self.use_conversion_cache:
+                cache_key = ConversionCache.make_key(html_content, base_url, converter.version)
+                cached = self.conversion_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Reusing cached Markdown for {base_url}")
+                    return cached
+            
+            markdown_content = converter.html_to_markdown(html_content, base_url)
+            if cache_key and markdown_content:
+                self.conversion_cache.put(cache_key, markdown_content)
+            return markdown_content
+        except Exception as e:
+            logger.error(f"Error in markdown conversion: {str(e)}")
+            return re.sub(r'<[^>]+>', ' ', html_content)
+    
+    def _run_markdown_converter_subprocess(self, html_content: str, base_url: str) -> str:
+        """Run the markdown converter in a separate interpreter (isolation fallback)."""
         try:
-            # Load and use the markdown converter
-            converter_path = Path(__file__).parent / "markdown-converter.py"
+            converter_path = MARKDOWN_CONVERTER_PATH
             if not converter_path.exists():
                 logger.warning("Markdown converter not found, using basic HTML stripping")
                 return re.sub(r'<[^>]+>', ' ', html_content)
@@ -768,9 +2563,10 @@ Please create well-structured, AI-optimized documentation."""
                 md_path = md_file.name
             
             # Call the markdown converter
-            result = subprocess.run([
-                sys.executable, str(converter_path), html_path, md_path, base_url
-            ], capture_output=True, text=True, timeout=120)
+            command = [sys.executable, str(converter_path), html_path, md_path, base_url]
+            if self.remove_boilerplate:
+                command.append('--remove-boilerplate')
+            result = subprocess.run(command, capture_output=True, text=True, timeout=120)
             
             if result.returncode == 0:
                 with open(md_path, 'r', encoding='utf-8') as f:
@@ -793,6 +2589,47 @@ Please create well-structured, AI-optimized documentation."""
             except:
                 pass
     
+    def _apply_fetch_options(self, options: Dict):
+        """Apply fetch-mode options.
+        
+        --async, --concurrency N, --per-host N, --fetch-workers N, --convert-workers N,
+        --queue-size N, --agent-workers N, --agent-limit N, --agent-chunk-size N,
+        --agent-timeout SECONDS, --no-cache, --refresh,
+        --isolate-converter, --full-page, --keep-boilerplate
+        """
+        if options.get('isolate-converter'):
+            self.isolate_converter = True
+        if options.get('full-page'):
+            self.extract_main_content = False
+        if options.get('keep-boilerplate'):
+            self.remove_boilerplate = False
+        if options.get('no-cache'):
+            self.use_response_cache = False
+            self.use_conversion_cache = False
+            self.use_agent_cache = False
+        if options.get('refresh'):
+            self.refresh_cache = True
+        if options.get('async'):
+            self.async_fetch = True
+        if 'concurrency' in options:
+            self.max_concurrency = max(1, int(options['concurrency']))
+        if 'per-host' in options:
+            self.per_host_concurrency = max(1, int(options['per-host']))
+        if 'agent-workers' in options:
+            self.agent_workers = max(1, int(options['agent-workers']))
+        if 'agent-limit' in options:
+            self.agent_global_limit = max(1, int(options['agent-limit']))
+        if 'fetch-workers' in options:
+            self.fetch_workers = max(1, int(options['fetch-workers']))
+        if 'convert-workers' in options:
+            self.convert_workers = max(1, int(options['convert-workers']))
+        if 'queue-size' in options:
+            self.pipeline_queue_size = max(1, int(options['queue-size']))
+        if 'agent-chunk-size' in options:
+            self.agent_chunk_chars = max(1000, int(options['agent-chunk-size']))
+        if 'agent-timeout' in options:
+            self.agent_timeout = max(1, int(options['agent-timeout']))
+    
     def create_metadata(self, library_name: str, urls: List[str], version: str = None) -> Dict:
         """Create metadata for the documentation."""
         return {
@@ -804,132 +2641,453 @@ Please create well-structured, AI-optimized documentation."""
             'ai_optimized': True
         }
     
+    def _load_fetch_state(self, lib_dir: Path) -> Optional[Dict]:
+        """Load what the previous fetch of a library recorded (sources and processed pages)."""
+        try:
+            with open(lib_dir / self.fetch_state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not state.get('source_urls') or not isinstance(state.get('pages'), dict):
+            return None
+        return state
+    
+    def _save_fetch_state(self, lib_dir: Path, state: Dict):
+        """Persist the fetch state next to the generated documentation."""
+        try:
+            atomic_write(lib_dir / self.fetch_state_file, json.dumps(state, indent=2).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not save fetch state for {lib_dir.name}: {str(e)}")
+    
+    def _page_fingerprint(self, document: str) -> str:
+        """Hash a fetched document together with the settings that shape its processed Markdown."""
+        module = load_markdown_converter()
+        converter_version = module.MarkdownConverter.VERSION if module else 'subprocess'
+        settings = (f"{converter_version}:{self.extract_main_content}:{self.remove_boilerplate}:"
+                    f"{self.enable_agent_integration}:{self.agent_chunk_chars}")
+        digest = hashlib.sha256(settings.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(TECHNICAL_WRITER_PROMPT.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(document.encode('utf-8', errors='replace'))
+        return digest.hexdigest()
+    
+    def _write_if_changed(self, path: Path, content: str) -> bool:
+        """Write a generated file unless it already holds exactly this content."""
+        return self._write_stream_if_changed(path, [content])
+    
+    def _write_stream_if_changed(self, path: Path, parts: Iterable[str]) -> bool:
+        """Stream parts into a temporary file and replace path only if the result differs."""
+        fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for part in parts:
+                    f.write(part)
+            if path.exists() and filecmp.cmp(temp_path, str(path), shallow=False):
+                os.unlink(temp_path)
+                return False
+            os.replace(temp_path, path)
+            return True
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    def _page_file(self, lib_dir: Path, url: str) -> Path:
+        """Return the page store file holding a source URL's processed Markdown."""
+        return lib_dir / self.page_store_dir / (hashlib.sha256(url.encode('utf-8')).hexdigest()[:16] + '.md')
+    
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Return the semaphore capping concurrent fetches to the URL's host."""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+            return self._host_slots[host]
+    
+    def _fetch_stage(self, page: Dict) -> Optional[Dict]:
+        """Pipeline stage: fetch and validate a page, learn site patterns, detect unchanged content."""
+        if self._past_deadline(page):
+            return None
+        url = page['url']
+        logger.info(f"Processing URL {page['index']}/{page['total']}: {url}")
+        
+        # Fetch the content; the result carries the quality report computed during the fetch
+        with self._host_slot(url):
+            fetch_result = self.fetch_page(url)
+        logger.info(f"Fetched {fetch_result.summary()}")
+        previous = page['previous']
+        if previous and not self._page_file(page['lib_dir'], url).exists():
+            previous = None
+        
+        if not fetch_result.ok:
+            with self.patterns_lock:
+                self._update_pattern_success(self._get_domain(url), False)
+            self.discovery_cache.invalidate_url(url)
+            if previous:
+                logger.warning(f"Could not revalidate {url}, keeping previously processed content")
+                page['reused'] = previous
+                return page
+            return None
+        
+        if fetch_result.main_content:
+            logger.info(f"Using main content ({len(fetch_result.main_content)} of {len(fetch_result.content)} chars)")
+        
+        # Learn from successful fetches (patterns are learned from the full page)
+        domain = self._get_domain(url)
+        with self.patterns_lock:
+            if fetch_result.quality['is_valid']:
+                if domain not in self.site_patterns:
+                    # Discover and save new pattern
+                    learned_pattern = self._discover_content_patterns(fetch_result.content, url)
+                    if learned_pattern:
+                        self._save_learned_pattern(domain, learned_pattern)
+                        self.site_patterns[domain] = learned_pattern
+                
+                self._update_pattern_success(domain, True)
+            else:
+                self._update_pattern_success(domain, False)
+        
+        # Pages whose content is unchanged since the previous fetch are not re-processed
+        page['document'] = fetch_result.document
+        page['fingerprint'] = self._page_fingerprint(page['document'])
+        # Pages the agent failed to organize last time are retried even when unchanged
+        if previous and previous.get('fingerprint') == page['fingerprint'] and previous.get('organized', True):
+            logger.info(f"Content unchanged, reusing processed Markdown for {url}")
+            page['reused'] = previous
+            page['document'] = None
+        return page
+    
+    def _convert_stage(self, page: Dict) -> Optional[Dict]:
+        """Pipeline stage: convert the page's HTML to Markdown."""
+        if page.get('reused'):
+            return page
+        if self._past_deadline(page):
+            return None
+        page['markdown'] = self._process_content_with_markdown_converter(page.pop('document'), page['url'])
+        return page if page['markdown'] else None
+    
+    def _organize_stage(self, page: Dict) -> Optional[Dict]:
+        """Pipeline stage: organize the Markdown with the Technical Writer agent (in chunks if large)."""
+        if page.get('reused'):
+            return page
+        if self._past_deadline(page):
+            return None
+        chunks, futures = self._submit_organization(page['markdown'], page['library_name'], f"documentation from {page['url']}")
+        page['markdown'], page['organized'] = self._collect_organization(chunks, futures)
+        if not page['organized']:
+            logger.warning(f"Stored unorganized Markdown for {page['url']}; it will be retried on --update")
+        return page
+    
+    def _write_stage(self, page: Dict) -> Dict:
+        """Pipeline stage: store the page's processed Markdown and return its fetch state entry."""
+        if page.get('reused'):
+            return {'library_name': page['library_name'], 'url': page['url'], 'entry': page['reused']}
+        
+        page_file = self._page_file(page['lib_dir'], page['url'])
+        page_file.parent.mkdir(parents=True, exist_ok=True)
+        self._write_if_changed(page_file, page.pop('markdown'))
+        logger.info(f"Stored processed page {page['url']} in {page_file.name}")
+        entry = {'fingerprint': page['fingerprint'], 'file': str(page_file.relative_to(page['lib_dir'])),
+                 'organized': page['organized']}
+        return {'library_name': page['library_name'], 'url': page['url'], 'entry': entry}
+    
+    def _create_page_pipeline(self, fetch_workers: Optional[int] = None) -> StagedPipeline:
+        """Build the fetch -> convert -> organize -> write page pipeline."""
+        if fetch_workers is None:
+            fetch_workers = self.max_concurrency if self.async_fetch else self.fetch_workers
+        return StagedPipeline([
+            ('fetch', self._fetch_stage, fetch_workers),
+            ('convert', self._convert_stage, self.convert_workers),
+            ('organize', self._organize_stage, self.agent_workers),
+            ('write', self._write_stage, 1)
+        ], queue_size=self.pipeline_queue_size)
+    
     def fetch_documentation(self, library_name: str, **options) -> bool:
         """Main method to fetch documentation for a library."""
         try:
             logger.info(f"Starting documentation fetch for: {library_name}")
+            self._apply_fetch_options(options)
             
-            # Create directory structure
-            lib_dir = self._create_directory_structure(library_name)
-            
-            # Check if user provided manual URL
-            if 'url' in options:
-                urls = [options['url']]
-                logger.info(f"Using manually provided URL: {options['url']}")
-            else:
-                # Discover documentation URLs
-                urls = self._discover_documentation_urls(library_name)
-            
-            if not urls:
-                logger.error(f"❌ Could not find documentation URLs for '{library_name}'")
-                print(f"\n❌ Documentation Discovery Failed")
-                print(f"Could not automatically discover documentation URLs for '{library_name}'.")
-                print(f"")
-                print(f"This could happen because:")
-                print(f"• The library name might be spelled incorrectly")
-                print(f"• The library might not have online documentation")
-                print(f"• The documentation might be at a non-standard URL")
-                print(f"• Network connectivity issues")
-                print(f"")
-                print(f"Please provide the documentation URL manually:")
-                print(f"Example: /docs:fetch {library_name} --url https://example.com/docs/")
-                print(f"")
-                print(f"Or check if you meant one of these popular libraries:")
-                
-                # Suggest similar library names
-                similar_libs = self._suggest_similar_libraries(library_name)
-                if similar_libs:
-                    print(f"• " + "\n• ".join(similar_libs))
-                
+            plan = self._plan_library(library_name, options)
+            if not plan:
                 return False
             
-            # Create metadata
-            metadata = self.create_metadata(library_name, urls, options.get('version'))
+            # Fetch, convert, organize and store pages through the staged pipeline; each page
+            # is written to the page store as soon as it finishes
+            pipeline = self._create_page_pipeline()
+            finished = pipeline.run(self._page_items(plan))
+            logger.info(f"Page pipeline for {library_name}: {pipeline.summary()}")
             
-            # Fetch and process content from each URL
-            processed_content = {}
-            for i, url in enumerate(urls[:3]):  # Limit to first 3 URLs for now
-                logger.info(f"Processing URL {i+1}/{min(len(urls), 3)}: {url}")
-                
-                # Fetch the content
-                html_content = self.fetch_page_content(url)
-                if not html_content:
-                    self._update_pattern_success(self._get_domain(url), False)
+            return self._finish_library(plan, finished)
+            
+        except Exception as e:
+            logger.error(f"Error processing {library_name}: {str(e)}")
+            return False
+    
+    def fetch_documentation_batch(self, requests: List[Tuple[str, Dict]], workers: int = 3,
+                                  library_timeout: Optional[float] = None, **options) -> Dict[str, bool]:
+        """Fetch several libraries through one shared page pipeline.
+        
+        requests holds (library_name, per-library options such as version and url) pairs.
+        Libraries are planned (URL discovery, stored state) on `workers` threads; as plans
+        complete, their pages are queued round-robin by domain and every stage's workers
+        take pages from any library, so batch time follows total work rather than the
+        slowest library. A library's files are written once all of its pages are through.
+        
+        With library_timeout, a library not through the pipeline within that many seconds
+        of its planning start fails: its remaining pages are dropped and no files are
+        written for it, as when a per-library docs-fetch.py process is killed.
+        """
+        self._apply_fetch_options(options)
+        results = {library_name: False for library_name, _ in requests}
+        plans = {}
+        deadlines = {} if library_timeout is not None else None
+        
+        def plan_library(library_name: str, library_options: Dict) -> Optional[Dict]:
+            if deadlines is not None:
+                deadlines[library_name] = time.monotonic() + library_timeout
+            return self._plan_library(library_name, dict(options, **library_options))
+        
+        pipeline = self._create_page_pipeline(fetch_workers=workers)
+        # Not a with block: a planner stuck past its deadline must not hold up the batch
+        planner = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='plan')
+        try:
+            futures = {planner.submit(plan_library, library_name, library_options): library_name
+                       for library_name, library_options in requests}
+            finished = pipeline.run(self._interleave_pages(futures, plans, deadlines))
+        finally:
+            planner.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"Batch page pipeline ({len(plans)} libraries): {pipeline.summary()}")
+        
+        by_library = {}
+        for item in finished:
+            by_library.setdefault(item['library_name'], []).append(item)
+        for library_name, plan in plans.items():
+            if any(page.get('expired') for page in plan['pages']):
+                logger.error(f"❌ Timeout fetching documentation for {library_name}")
+                continue
+            try:
+                results[library_name] = self._finish_library(plan, by_library.get(library_name, []))
+            except Exception as e:
+                logger.error(f"Error processing {library_name}: {str(e)}")
+        return results
+    
+    def _interleave_pages(self, plan_futures: Dict[Future, str], plans: Dict[str, Dict],
+                          deadlines: Optional[Dict[str, float]] = None):
+        """Yield page items from library plans as they complete, rotating between domains.
+        
+        plan_futures maps each plan future to its library name. deadlines, when given, is
+        filled with each library's deadline as its planning starts; plans still running at
+        their deadline are abandoned and queued pages of expired libraries are dropped.
+        """
+        pending = set(plan_futures)
+        queued = {}  # domain -> pages waiting to be scheduled
+        rotation = deque()  # domains with queued pages, in round-robin order
+        
+        while pending or rotation:
+            if deadlines is not None:
+                now = time.monotonic()
+                for future in [future for future in pending if not future.done()
+                               and deadlines.get(plan_futures[future], now + 1) <= now]:
+                    pending.discard(future)
+                    logger.error(f"❌ Timeout fetching documentation for {plan_futures[future]}")
+                if not pending and not rotation:
+                    break
+            
+            # Take in every finished plan; block for one only when nothing is queued
+            done = {future for future in pending if future.done()}
+            if not done and not rotation:
+                timeout = None
+                if deadlines is not None:
+                    # Plans not started yet have no deadline; look again within a second
+                    now = time.monotonic()
+                    timeout = max(0.0, min(deadlines.get(plan_futures[future], now + 1) for future in pending) - now)
+                done, _ = wait_for_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                try:
+                    plan = future.result()
+                except Exception as e:
+                    logger.error(f"Error planning library fetch: {str(e)}")
                     continue
-                
-                # Validate content quality
-                quality = self.quality_validator.validate_content_quality(html_content, url)
-                
-                # Learn from successful fetches
-                if quality['is_valid']:
-                    domain = self._get_domain(url)
-                    if domain not in self.site_patterns:
-                        # Discover and save new pattern
-                        learned_pattern = self._discover_content_patterns(html_content, url)
-                        if learned_pattern:
-                            self._save_learned_pattern(domain, learned_pattern)
-                            self.site_patterns[domain] = learned_pattern
-                    
-                    self._update_pattern_success(domain, True)
+                if not plan:
+                    continue
+                plans[plan['library_name']] = plan
+                if deadlines is not None:
+                    plan['deadline'] = deadlines[plan['library_name']]
+                plan['pages'] = self._page_items(plan)
+                for page in plan['pages']:
+                    domain = self._get_domain(page['url'])
+                    if domain not in queued:
+                        queued[domain] = deque()
+                        rotation.append(domain)
+                    queued[domain].append(page)
+            
+            if rotation:
+                domain = rotation.popleft()
+                page = queued[domain].popleft()
+                if not self._past_deadline(page):
+                    yield page
+                if queued[domain]:
+                    rotation.append(domain)
                 else:
-                    self._update_pattern_success(self._get_domain(url), False)
-                
-                # Convert HTML to Markdown
-                markdown_content = self._process_content_with_markdown_converter(html_content, url)
-                
-                # Organize content with Technical Writer agent
-                if markdown_content:
-                    organized_content = self._call_technical_writer_agent(
-                        markdown_content, library_name, f"documentation from {url}"
-                    )
-                    processed_content[url] = organized_content
-            
-            # Check if we actually got any useful content
-            if not processed_content:
-                logger.error(f"❌ Failed to fetch any documentation content for '{library_name}'")
-                print(f"\n❌ Content Fetch Failed")
-                print(f"Found documentation URLs for '{library_name}' but failed to fetch content from all of them.")
-                print(f"This could be due to:")
-                print(f"• Network connectivity issues")
-                print(f"• Website blocking automated requests")
-                print(f"• Temporary server issues")
-                print(f"• URLs requiring authentication")
-                print(f"")
-                print(f"Found URLs attempted:")
-                for url in urls:
-                    print(f"• {url}")
-                print(f"")
-                print(f"Please try again later, or provide a different URL:")
-                print(f"Example: /docs:fetch {library_name} --url https://alternative-docs-url.com/")
-                
-                # Clean up empty directory structure
-                import shutil
-                try:
-                    if lib_dir.exists():
-                        shutil.rmtree(lib_dir)
-                        logger.info(f"Cleaned up empty directory: {lib_dir}")
-                except:
-                    pass
-                
-                return False
+                    del queued[domain]
+    
+    def _plan_library(self, library_name: str, options: Dict) -> Optional[Dict]:
+        """Resolve a library's directory, source URLs and previous state; None if there is nothing to fetch."""
+        # Create directory structure
+        lib_dir = self._create_directory_structure(library_name)
+        
+        # --update revalidates the sources recorded by the previous fetch and only
+        # re-processes pages whose content changed
+        state = self._load_fetch_state(lib_dir) if options.get('update') else None
+        if state and options.get('url') not in (None, *state['source_urls']):
+            logger.info(f"Source URL changed, fetching {library_name} from scratch")
+            state = None
+        
+        if state:
+            urls = state['source_urls']
+            logger.info(f"Updating {library_name} from {len(urls)} stored source URL(s)")
+        elif 'url' in options:
+            urls = [options['url']]
+            logger.info(f"Using manually provided URL: {options['url']}")
+        else:
+            # Discover documentation URLs
+            urls = self._discover_documentation_urls(library_name)
+        
+        if not urls:
+            logger.error(f"❌ Could not find documentation URLs for '{library_name}'")
+            print(f"\n❌ Documentation Discovery Failed")
+            print(f"Could not automatically discover documentation URLs for '{library_name}'.")
+            print(f"")
+            print(f"This could happen because:")
+            print(f"• The library name might be spelled incorrectly")
+            print(f"• The library might not have online documentation")
+            print(f"• The documentation might be at a non-standard URL")
+            print(f"• Network connectivity issues")
+            print(f"")
+            print(f"Please provide the documentation URL manually:")
+            print(f"Example: /docs:fetch {library_name} --url https://example.com/docs/")
+            print(f"")
+            print(f"Or check if you meant one of these popular libraries:")
             
-            # Create documentation files
-            self._create_documentation_files(lib_dir, library_name, metadata, urls, processed_content)
+            # Suggest similar library names
+            similar_libs = self._suggest_similar_libraries(library_name)
+            if similar_libs:
+                print(f"• " + "\n• ".join(similar_libs))
             
-            # Update CLAUDE.md to reference the new documentation
-            self._update_claude_md(library_name, lib_dir, metadata)
+            return None
+        
+        # Create metadata
+        metadata = self.create_metadata(library_name, urls, options.get('version') or (state or {}).get('version'))
+        return {
+            'library_name': library_name,
+            'lib_dir': lib_dir,
+            'urls': urls,
+            'state': state,
+            'metadata': metadata,
+            'previous_pages': state['pages'] if state else {}
+        }
+    
+    def _page_items(self, plan: Dict) -> List[Dict]:
+        """Return the page pipeline items for a planned library."""
+        sources = plan['urls'][:3]  # Limit to first 3 URLs for now
+        return [{'url': url, 'index': i, 'total': len(sources), 'library_name': plan['library_name'],
+                 'lib_dir': plan['lib_dir'], 'previous': plan['previous_pages'].get(url),
+                 'deadline': plan.get('deadline')}
+                for i, url in enumerate(sources, 1)]
+    
+    def _past_deadline(self, page: Dict) -> bool:
+        """Mark and report a page whose library ran out of time before the page was processed."""
+        if page['deadline'] is None or time.monotonic() < page['deadline']:
+            return False
+        if not page.get('expired'):
+            page['expired'] = True
+            logger.warning(f"Deadline for {page['library_name']} passed, dropping {page['url']}")
+        return True
+    
+    def _finish_library(self, plan: Dict, finished: List[Dict]) -> bool:
+        """Write a library's documentation files from its finished pages and save its fetch state."""
+        library_name, lib_dir, urls = plan['library_name'], plan['lib_dir'], plan['urls']
+        state, metadata, previous_pages = plan['state'], plan['metadata'], plan['previous_pages']
+        
+        # Keep source order regardless of which pages finished first
+        pages = {item['url']: item['entry'] for item in finished}
+        pages = {url: pages[url] for url in urls if url in pages}
+        
+        # Check if we actually got any useful content
+        if not pages:
+            logger.error(f"❌ Failed to fetch any documentation content for '{library_name}'")
+            print(f"\n❌ Content Fetch Failed")
+            print(f"Found documentation URLs for '{library_name}' but failed to fetch content from all of them.")
+            print(f"This could be due to:")
+            print(f"• Network connectivity issues")
+            print(f"• Website blocking automated requests")
+            print(f"• Temporary server issues")
+            print(f"• URLs requiring authentication")
+            print(f"")
+            print(f"Found URLs attempted:")
+            for url in urls:
+                print(f"• {url}")
+            print(f"")
+            print(f"Please try again later, or provide a different URL:")
+            print(f"Example: /docs:fetch {library_name} --url https://alternative-docs-url.com/")
             
-            logger.info(f"Documentation created for {library_name} in {lib_dir}")
-            return True
+            if state:
+                # Leave the documentation from the previous fetch in place
+                return False
+            
+            # Clean up empty directory structure
+            import shutil
+            try:
+                if lib_dir.exists():
+                    shutil.rmtree(lib_dir)
+                    logger.info(f"Cleaned up empty directory: {lib_dir}")
+            except:
+                pass
             
-        except Exception as e:
-            logger.error(f"Error processing {library_name}: {str(e)}")
             return False
+        
+        # An update that changed nothing keeps the previous date, so the generated files
+        # come out identical and are not rewritten
+        unchanged = (state and list(pages) == list(previous_pages) and metadata['version'] == state.get('version')
+                     and all(pages[url] is previous_pages[url] for url in pages))
+        if unchanged:
+            metadata['last_fetched'] = state.get('last_fetched', metadata['last_fetched'])
+        
+        # Create documentation files
+        written = self._create_documentation_files(lib_dir, library_name, metadata, urls, pages)
+        
+        # Update CLAUDE.md to reference the new documentation
+        if written:
+            self._update_claude_md(library_name, lib_dir, metadata)
+        
+        self._save_fetch_state(lib_dir, {
+            'version': metadata['version'],
+            'source_urls': urls,
+            'last_fetched': metadata['last_fetched'],
+            'last_checked': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'pages': pages
+        })
+        
+        if written:
+            logger.info(f"Documentation written for {library_name} in {lib_dir} ({', '.join(written)})")
+        else:
+            logger.info(f"Documentation for {library_name} is up to date in {lib_dir}")
+        return True
     
-    def _create_documentation_files(self, lib_dir: Path, library_name: str, metadata: Dict, urls: List[str], processed_content: Dict[str, str]):
-        """Create documentation files from processed content."""
+    def _create_documentation_files(self, lib_dir: Path, library_name: str, metadata: Dict, urls: List[str], pages: Dict[str, Dict]) -> List[str]:
+        """Create documentation files from the processed pages in the page store.
+        
+        Files whose content did not change are left untouched; returns the names written.
+        """
+        written = []
+        
         # Update metadata completeness based on successful content processing
-        completeness = int((len(processed_content) / len(urls)) * 100)
+        completeness = int((len(pages) / len(urls)) * 100)
         metadata['completeness'] = completeness
         
         # Create index file
@@ -953,7 +3111,7 @@ This directory contains AI-optimized documentation for {library_name}, fetched f
 
 The following official documentation sources were processed:
 
-{chr(10).join(f'- [{url}]({url}) {"✅" if url in processed_content else "❌"}' for url in urls)}
+{chr(10).join(f'- [{url}]({url}) {"✅" if url in pages else "❌"}' for url in urls)}
 
 ## Structure
 
@@ -966,7 +3124,7 @@ The following official documentation sources were processed:
 
 - ✅ Directory structure created
 - ✅ Source URLs identified  
-- ✅ Content fetched ({len(processed_content)}/{len(urls)} sources)
+- ✅ Content fetched ({len(pages)}/{len(urls)} sources)
 - ✅ Content processed and AI-optimized
 - ✅ Technical Writer agent organization
 
@@ -976,13 +3134,13 @@ The following official documentation sources were processed:
 """
         
         index_file = lib_dir / 'index.md'
-        with open(index_file, 'w', encoding='utf-8') as f:
-            f.write(index_content)
-        logger.info(f"Created index file: {index_file}")
+        if self._write_if_changed(index_file, index_content):
+            written.append(index_file.name)
+            logger.info(f"Created index file: {index_file}")
         
-        # Create consolidated API reference from all processed content
-        if processed_content:
-            api_content = f"""---
+        # Create consolidated API reference from all processed pages, streamed one page at a time
+        if pages:
+            api_header = f"""---
 library: "{metadata['library']}"
 version: "{metadata['version']}"
 last_fetched: "{metadata['last_fetched']}"
@@ -994,15 +3152,10 @@ This document contains comprehensive API documentation for {library_name}, conso
 
 """
             
-            for i, (url, content) in enumerate(processed_content.items(), 1):
-                api_content += f"\n## Source {i}: {url}\n\n"
-                api_content += content
-                api_content += "\n\n---\n\n"
-            
             api_file = lib_dir / 'api-reference.md'
-            with open(api_file, 'w', encoding='utf-8') as f:
-                f.write(api_content)
-            logger.info(f"Created API reference file: {api_file}")
+            if self._write_stream_if_changed(api_file, self._iter_api_reference(lib_dir, api_header, pages)):
+                written.append(api_file.name)
+                logger.info(f"Created API reference file: {api_file}")
         
         # Create best practices file template
         best_practices_content = f"""---
@@ -1041,9 +3194,19 @@ This document contains current patterns, conventions, and best practices for usi
 """
         
         best_practices_file = lib_dir / 'best-practices.md'
-        with open(best_practices_file, 'w', encoding='utf-8') as f:
-            f.write(best_practices_content)
-        logger.info(f"Created best practices file: {best_practices_file}")
+        if self._write_if_changed(best_practices_file, best_practices_content):
+            written.append(best_practices_file.name)
+            logger.info(f"Created best practices file: {best_practices_file}")
+        
+        return written
+    
+    def _iter_api_reference(self, lib_dir: Path, header: str, pages: Dict[str, Dict]):
+        """Yield api-reference.md in pieces, reading each stored page only when it is needed."""
+        yield header
+        for i, (url, entry) in enumerate(pages.items(), 1):
+            yield f"\n## Source {i}: {url}\n\n"
+            yield (lib_dir / entry['file']).read_text(encoding='utf-8')
+            yield "\n\n---\n\n"
     
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL."""
@@ -1173,15 +3336,24 @@ def main():
     if len(sys.argv) < 2:
         print("Usage: python docs-fetch.py <library_name> [options]")
         print("Example: python docs-fetch.py react --version 18.3.0")
+        print("         python docs-fetch.py mylib --async --concurrency 8 --per-host 2  # 8 fetch workers, 2 per host")
+        print("         python docs-fetch.py mylib --update     # Revalidate stored sources, re-process changed pages only")
+        print("         python docs-fetch.py mylib --refresh    # Re-download, ignoring cached validators")
+        print("         python docs-fetch.py mylib --no-cache   # Bypass the response, conversion and agent caches")
+        print("         python docs-fetch.py mylib --agent-workers 3 --agent-limit 4  # Agent calls in flight (run / all processes)")
+        print("         python docs-fetch.py mylib --agent-chunk-size 40000 --agent-timeout 300  # Per-chunk agent work")
+        print("         python docs-fetch.py mylib --isolate-converter  # Convert HTML in a subprocess")
+        print("         python docs-fetch.py mylib --full-page  # Convert whole pages, not just the main content")
+        print("         python docs-fetch.py mylib --keep-boilerplate  # Keep link-dense menus and footers")
         sys.exit(1)
     
     # Parse arguments
     args_string = ' '.join(sys.argv[1:])
-    fetcher = DocsFetcher()
     
     try:
-        library_name, options = fetcher.parse_arguments(args_string)
-        success = fetcher.fetch_documentation(library_name, **options)
+        with DocsFetcher() as fetcher:
+            library_name, options = fetcher.parse_arguments(args_string)
+            success = fetcher.fetch_documentation(library_name, **options)
         
         if success:
             print(f"✅ Documentation structure created for {library_name}")
@@ -5,18 +5,494 @@ Converts HTML content to AI-friendly Markdown format with proper sanitization.
 """
 
 import re
+import sys
 import html
+import codecs
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import argparse
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 from urllib.parse import urljoin, urlparse
 
 logger = logging.getLogger(__name__)
 
+def format_markdown_table(rows: List[List[str]]) -> str:
+    """Render table rows as a Markdown table, treating the first row as the header."""
+    if not rows:
+        return ''
+    lines = []
+    for i, cells in enumerate(rows):
+        lines.append('| ' + ' | '.join(cells) + ' |')
+        if i == 0:
+            lines.append('| ' + ' | '.join(['---'] * len(cells)) + ' |')
+    return '\n' + '\n'.join(lines) + '\n'
+
+LEADING_BLANK_LINES_RE = re.compile(r'\A(?:[ \t]*\n)+')
+
+def trim_code_block(code: str) -> str:
+    """Drop blank lines and trailing whitespace around code, keeping the first line's indentation."""
+    return LEADING_BLANK_LINES_RE.sub('', code).rstrip()
+
+# Deepest list indentation emitted; deeper (usually unclosed) lists reuse it, which bounds output size
+MAX_LIST_INDENT = 10
+
+class StreamingMarkdownEngine(HTMLParser):
+    """Single-pass Markdown engine built on an incremental HTML tokenizer.
+    
+    Walks the document once and emits Markdown into an output buffer. Content that
+    has to be wrapped after the fact (links, code blocks, table cells) is captured in
+    a nested buffer until its closing tag arrives.
+    """
+    
+    # Elements dropped together with their content
+    SKIP_CONTAINERS = {'script', 'style', 'noscript', 'iframe', 'object', 'template'}
+    
+    # Elements dropped without content (void elements)
+    SKIP_VOID = {'embed'}
+    
+    # Structural containers that start a new line
+    BLOCK_ELEMENTS = {
+        'section', 'article', 'main', 'header', 'footer', 'nav', 'aside',
+        'blockquote', 'dl', 'dt', 'dd', 'figure', 'figcaption', 'form', 'hr'
+    }
+    
+    HEADINGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+    
+    LANGUAGE_CLASS_RE = re.compile(r'(?:^|\s)(?:language-|lang-|brush:|hljs )(\S+)')
+    
+    # Boilerplate removal: containers scored by text-to-link density when they close
+    SCORED_BLOCKS = {'div', 'section', 'nav', 'aside', 'footer', 'header', 'form'}
+    NEGATIVE_TAGS = {'nav', 'footer'}  # Not aside: admonitions and callouts use it for content
+    NEGATIVE_HINT_RE = re.compile(
+        r'(?:^|[-_\s])(?:nav|navbar|navigation|menu|footer|sidebar|toc|breadcrumbs?|cookies?|consent|'
+        r'banner|social|share|sharing|subscribe|newsletter|advert|ads|promo|related)(?:$|[-_\s])', re.IGNORECASE)
+    POSITIVE_HINT_RE = re.compile(
+        r'(?:^|[-_\s])(?:content|article|main|body|docs?|documentation|post|entry|markdown|prose)(?:$|[-_\s])',
+        re.IGNORECASE)
+    # Blocks holding more text than this are always kept, so their output is released right away
+    MAX_BOILERPLATE_TEXT = 3000
+    
+    def __init__(self, base_url: str = "", remove_boilerplate: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.remove_boilerplate = remove_boilerplate
+        self._buffers = [[]]  # Stack of output buffers; the bottom one is the document
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._code_language = ''
+        self._lists = []  # Stack of [ordered, item_count]
+        self._item_start = False  # Just emitted a list marker; drop leading whitespace and breaks
+        self._links = []  # Stack of href (None for anchors without a usable href)
+        self._tables = []  # Stack of tables, each a list of rows
+        self._rows = []  # Stack of rows being built, parallel to _tables
+        self._cells = []  # Whether each table has an open cell (which owns a buffer), parallel to _tables
+        self._blocks = []  # Open scored blocks (boilerplate removal), innermost last
+        self._block_counts = {}  # tag -> number of open scored blocks, for constant-time end tag lookup
+        self._open_links = 0  # Open anchors with an href; their text counts as link text
+    
+    def get_markdown(self) -> str:
+        """Finish parsing and return the emitted Markdown (before whitespace cleanup)."""
+        self.close()
+        
+        # Score blocks left open at the end of the document
+        while self._blocks:
+            self._finish_block(self._blocks.pop())
+        
+        # Fold any buffers left open by unbalanced markup into the document
+        while len(self._buffers) > 1:
+            captured = self._pop()
+            self._emit(captured)
+        
+        return ''.join(self._buffers[0])
+    
+    def take_completed(self) -> str:
+        """Remove and return the finished lines of the document emitted so far.
+        
+        Text is held back while a nested buffer or a droppable block is open, and so are
+        the last line with content plus any whitespace after it, since later list items
+        may still trim them.
+        """
+        if len(self._buffers) > 1 or (self._blocks and not self._blocks[-1]['kept']):
+            return ''
+        
+        buffer = self._buffers[0]
+        document = ''.join(buffer)
+        content_end = len(document.rstrip())
+        cut = document.rfind('\n', 0, content_end) + 1
+        buffer.clear()
+        if cut < len(document):
+            buffer.append(document[cut:])
+        return document[:cut]
+    
+    def _emit(self, text: str):
+        self._buffers[-1].append(text)
+    
+    def _push(self):
+        self._buffers.append([])
+    
+    def _pop(self) -> str:
+        return ''.join(self._buffers.pop()) if len(self._buffers) > 1 else ''
+    
+    def _resolve_url(self, url: str) -> str:
+        if self.base_url and url.startswith('/'):
+            return urljoin(self.base_url, url)
+        return url
+    
+    def handle_starttag(self, tag: str, attrs):
+        if self._skip_depth:
+            if tag in self.SKIP_CONTAINERS:
+                self._skip_depth += 1
+            return
+        
+        if tag in self.SKIP_CONTAINERS:
+            self._skip_depth = 1
+            return
+        
+        if tag in self.SKIP_VOID:
+            return
+        
+        attributes = dict(attrs)
+        
+        if self._pre_depth:
+            # Inside code blocks only the text survives; tags vanish without spacing
+            if tag == 'pre':
+                self._pre_depth += 1
+            elif tag == 'br':
+                self._emit('\n')
+            elif tag == 'code' and not self._code_language:
+                self._code_language = self._detect_language(attributes)
+            return
+        
+        if tag == 'pre':
+            self._pre_depth = 1
+            self._code_language = self._detect_language(attributes)
+            if self._blocks:
+                self._blocks[-1]['code'] += 1
+            self._push()
+        elif tag == 'code':
+            self._emit('`')
+        elif tag in ('ul', 'ol'):
+            self._lists.append([tag == 'ol', 0])
+            self._item_start = False
+            self._emit('\n')
+        elif tag == 'li':
+            self._trim_output()
+            if self._lists:
+                current = self._lists[-1]
+                current[1] += 1
+                marker = f"{current[1]}." if current[0] else '-'
+                self._emit('\n' + '  ' * min(len(self._lists) - 1, MAX_LIST_INDENT) + marker + ' ')
+            else:
+                self._emit('\n- ')
+            self._item_start = True
+        elif self._item_start and (tag in ('p', 'div') or tag in self.BLOCK_ELEMENTS):
+            # Paragraph wrappers directly inside an item stay on the marker line
+            pass
+        elif tag == 'a':
+            href = attributes.get('href')
+            if href is not None and not href.strip().lower().startswith('javascript:'):
+                self._links.append(href)
+                self._open_links += 1
+                if self._blocks:
+                    self._blocks[-1]['links'] += 1
+                self._push()
+            else:
+                self._links.append(None)
+                self._emit(' ')
+        elif tag == 'img':
+            src = attributes.get('src')
+            if src:
+                alt = attributes.get('alt') or 'Image'
+                self._emit(f'![{alt}]({self._resolve_url(src)})')
+        elif tag == 'table':
+            self._tables.append([])
+            self._rows.append(None)
+            self._cells.append(False)
+        elif tag == 'tr':
+            if self._tables:
+                self._close_row()
+                self._rows[-1] = []
+        elif tag in ('td', 'th'):
+            if self._tables:
+                self._close_cell()
+                if self._rows[-1] is None:
+                    self._rows[-1] = []
+                self._cells[-1] = True
+                self._push()
+        elif tag in self.HEADINGS:
+            if self._blocks:
+                self._blocks[-1]['headings'] += 1
+            self._emit('\n' + '#' * self.HEADINGS[tag] + ' ')
+        elif tag in ('strong', 'b'):
+            self._emit('**')
+        elif tag in ('em', 'i'):
+            self._emit('*')
+        elif tag == 'p':
+            self._emit('\n\n')
+        elif tag == 'div' or tag in self.BLOCK_ELEMENTS:
+            self._emit('\n')
+        else:
+            self._emit(' ')
+        
+        if self.remove_boilerplate and tag in self.SCORED_BLOCKS:
+            self._open_block(tag, attributes)
+    
+    def handle_endtag(self, tag: str):
+        if self._skip_depth:
+            if tag in self.SKIP_CONTAINERS:
+                self._skip_depth -= 1
+            return
+        
+        if self._pre_depth:
+            if tag == 'pre':
+                self._pre_depth -= 1
+                if not self._pre_depth:
+                    code = self._pop()
+                    self._emit(f'\n```{self._code_language}\n{trim_code_block(code)}\n```\n')
+                    self._code_language = ''
+            return
+        
+        if self._block_counts.get(tag):
+            # Close (and score) the block, plus any scored blocks left open inside it
+            while True:
+                block = self._blocks.pop()
+                self._block_counts[block['tag']] -= 1
+                self._finish_block(block)
+                if block['tag'] == tag:
+                    break
+        
+        if tag == 'code':
+            self._emit('`')
+        elif tag in ('ul', 'ol'):
+            if self._lists:
+                self._lists.pop()
+            self._item_start = False
+            self._trim_output()
+            self._emit('\n')
+        elif tag == 'li':
+            pass
+        elif tag == 'a':
+            href = self._links.pop() if self._links else None
+            if href is None:
+                self._emit(' ')
+                return
+            self._open_links -= 1
+            text = self._pop().strip()
+            href = self._resolve_url(href)
+            if not text or href == '#':
+                self._emit(text)
+            else:
+                self._emit(f'[{text}]({href})')
+        elif tag in ('td', 'th'):
+            self._close_cell()
+        elif tag == 'tr':
+            self._close_row()
+        elif tag == 'table':
+            if self._tables:
+                self._close_row()
+                rows = self._tables.pop()
+                self._rows.pop()
+                self._cells.pop()
+                if self._tables:
+                    # Markdown has no nested tables; keep the inner table's text in the cell
+                    self._emit(' ' + ' '.join(' '.join(row) for row in rows) + ' ')
+                else:
+                    self._emit(format_markdown_table(rows))
+        elif tag in self.HEADINGS:
+            self._emit('\n')
+        elif tag in ('strong', 'b'):
+            self._emit('**')
+        elif tag in ('em', 'i'):
+            self._emit('*')
+        elif tag == 'p':
+            pass
+        elif tag == 'div' or tag in self.BLOCK_ELEMENTS:
+            self._emit('\n')
+        else:
+            self._emit(' ')
+    
+    def handle_data(self, data: str):
+        if self._skip_depth:
+            return
+        if self._blocks and not self._blocks[-1]['kept']:
+            block = self._blocks[-1]
+            # Only non-space characters count, so text split across chunks scores the same
+            text_length = sum(map(len, data.split()))
+            block['text'] += text_length
+            if self._open_links:
+                block['link_text'] += text_length
+            if block['text'] > self.MAX_BOILERPLATE_TEXT:
+                self._commit_blocks()
+        if self._item_start and not self._pre_depth:
+            data = data.lstrip()
+            if not data:
+                return
+            self._item_start = False
+        self._emit(data)
+    
+    def _open_block(self, tag: str, attributes: Dict):
+        """Start scoring a container; its output stays droppable until it closes."""
+        hints = f"{attributes.get('class') or ''} {attributes.get('id') or ''}"
+        buffer = self._buffers[-1]
+        self._blocks.append({
+            'tag': tag,
+            'buffer': buffer,  # Output of the block starts at buffer[start]
+            'start': len(buffer),
+            'kept': False,  # Known to be kept; a kept block's enclosing blocks are kept too
+            'negative': tag in self.NEGATIVE_TAGS or bool(self.NEGATIVE_HINT_RE.search(hints)),
+            'positive': bool(self.POSITIVE_HINT_RE.search(hints)),
+            'text': 0,
+            'link_text': 0,
+            'links': 0,
+            'code': 0,
+            'headings': 0
+        })
+        self._block_counts[tag] = self._block_counts.get(tag, 0) + 1
+    
+    def _finish_block(self, block: Dict):
+        """Drop a closed block's output if it scores as boilerplate."""
+        if block['kept']:
+            return
+        
+        if self._buffers[-1] is not block['buffer']:
+            # Unbalanced markup left a link or cell open inside the block; keep it as is
+            return
+        
+        if self._is_boilerplate(block):
+            # Truncating is linear overall: every piece of output is dropped at most once
+            del block['buffer'][block['start']:]
+            return
+        
+        parent = self._blocks[-1] if self._blocks else None
+        if parent and not parent['kept']:
+            for key in ('text', 'link_text', 'links', 'code', 'headings'):
+                parent[key] += block[key]
+            if parent['text'] > self.MAX_BOILERPLATE_TEXT:
+                self._commit_blocks()
+    
+    def _is_boilerplate(self, block: Dict) -> bool:
+        """Score a closed block: link-dense blocks without code are boilerplate.
+        
+        Blocks hinted as chrome (nav, footer, menu classes) need fewer links to be dropped,
+        but are only ever dropped for their links; link-free text in them is kept.
+        """
+        if block['code'] or not block['links'] or (block['positive'] and not block['negative']):
+            return False
+        
+        link_density = block['link_text'] / block['text'] if block['text'] else 0.0
+        if block['negative']:
+            return link_density >= 0.5
+        return block['links'] >= 3 and link_density >= 0.7 and not block['headings']
+    
+    def _commit_blocks(self):
+        """Mark the innermost open block and all enclosing blocks as kept.
+        
+        Enclosing blocks of a kept block are always kept too, so the walk stops at the
+        first block that was already kept and each block is visited once.
+        """
+        for block in reversed(self._blocks):
+            if block['kept']:
+                break
+            block['kept'] = True
+    
+    def _trim_output(self):
+        """Drop trailing whitespace from the current buffer, so list items stay adjacent."""
+        buffer = self._buffers[-1]
+        # Never reach into output that precedes an open droppable block, or dropping it would
+        # cut too little. Kept blocks are never cut, and take_completed() may have released
+        # the output their start index pointed into, so they set no floor.
+        block = self._blocks[-1] if self._blocks else None
+        floor = block['start'] if block and not block['kept'] and block['buffer'] is buffer else 0
+        while len(buffer) > floor and not buffer[-1].strip():
+            buffer.pop()
+        if len(buffer) > floor:
+            buffer[-1] = buffer[-1].rstrip()
+    
+    def _close_cell(self):
+        """Finish the open cell of the innermost table, if any."""
+        if self._cells and self._cells[-1]:
+            text = ' '.join(self._pop().split())
+            self._cells[-1] = False
+            self._rows[-1].append(text)
+    
+    def _close_row(self):
+        """Finish the open row of the innermost table, if any."""
+        if not self._rows:
+            return
+        self._close_cell()
+        row = self._rows[-1]
+        if row:
+            self._tables[-1].append(row)
+        self._rows[-1] = None
+    
+    def _detect_language(self, attributes: Dict) -> str:
+        match = self.LANGUAGE_CLASS_RE.search(attributes.get('class') or '')
+        return match.group(1) if match else ''
+
+class IncrementalWhitespaceCleaner:
+    """Applies MarkdownConverter._clean_whitespace to a document that arrives in pieces.
+    
+    Pieces must end on a line break. Each run of line breaks is held back until the text
+    after it arrives, so blank lines collapse exactly as they would in one pass.
+    """
+    
+    def __init__(self, converter: 'MarkdownConverter'):
+        self.converter = converter
+        self.pending_newlines = 0
+        self.in_code = False  # Whether the output so far ends inside a fenced code block
+        self.started = False  # Whether any content has been returned yet
+    
+    def feed(self, text: str) -> str:
+        """Clean the next piece and return the output that is final."""
+        if not text:
+            return ''
+        
+        text = '\n' * self.pending_newlines + text.replace('\r\n', '\n').replace('\r', '\n')
+        body = text.rstrip('\n')
+        self.pending_newlines = len(text) - len(body)
+        return self._finalize(body)
+    
+    def finish(self, text: str) -> str:
+        """Clean the last piece of the document and return the remaining output."""
+        text = '\n' * self.pending_newlines + text.replace('\r\n', '\n').replace('\r', '\n')
+        self.pending_newlines = 0
+        return self._finalize(text).rstrip()
+    
+    def _finalize(self, text: str) -> str:
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        text, self.in_code = self.converter._clean_lines_outside_code(text, self.in_code)
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        return text
+
 class MarkdownConverter:
     """Converts HTML to AI-friendly Markdown format."""
     
-    def __init__(self):
+    # Bump whenever conversion output changes; caches of converted Markdown are keyed on it
+    VERSION = '2.1'
+    
+    # Available conversion engines: 'stream' tokenizes once, 'regex' runs one pass per element type
+    ENGINES = ('stream', 'regex')
+    
+    # Tags driving the structural pass for lists and tables
+    STRUCTURE_TAG_RE = re.compile(r'<(/?)(ul|ol|li|table|tr|td|th)\b[^>]*>', re.IGNORECASE)
+    ITEM_BREAK_RE = re.compile(r'</?(?:p|div)\b[^>]*>', re.IGNORECASE)
+    STRIP_TAGS_RE = re.compile(r'<[^>]+>')
+    SPACE_RUN_RE = re.compile(r'^( +)(?=(?:-|\d+\.) )|[ \t]+', re.MULTILINE)
+    CODE_FENCE_LINE_RE = re.compile(r'^(```[^\n]*)$', re.MULTILINE)
+    
+    def __init__(self, engine: str = 'stream', remove_boilerplate: bool = False):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown conversion engine: {engine}")
+        
+        self.engine = engine
+        self.remove_boilerplate = remove_boilerplate  # Stream engine only: drop link-dense page chrome
         self.base_url = ""
         
         # HTML tags to Markdown mapping
@@ -40,6 +516,12 @@ class MarkdownConverter:
         # Block-level elements that need line breaks
         self.block_elements = {'div', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'blockquote', 'pre'}
     
+    @property
+    def version(self) -> str:
+        """Identify the output this converter produces (converter version plus engine)."""
+        suffix = '-boilerplate-removed' if self.remove_boilerplate and self.engine == 'stream' else ''
+        return f"{self.VERSION}-{self.engine}{suffix}"
+    
     def sanitize_html(self, html_content: str) -> str:
         """Sanitize HTML content to prevent script injection."""
         if not html_content:
@@ -66,15 +548,27 @@ class MarkdownConverter:
         if not html_content:
             return ""
         
+        if self.engine == 'stream':
+            return self._extract_with_stream_engine(html_content)
+        
+        return self._extract_with_regex_engine(html_content)
+    
+    def _extract_with_stream_engine(self, html_content: str) -> str:
+        """Convert in a single tokenizer pass."""
+        engine = StreamingMarkdownEngine(self.base_url, self.remove_boilerplate)
+        engine.feed(html_content)
+        return self._clean_whitespace(engine.get_markdown())
+    
+    def _extract_with_regex_engine(self, html_content: str) -> str:
+        """Convert with one regex pass per element type."""
         # Sanitize first
         content = self.sanitize_html(html_content)
         
         # Handle special elements
         content = self._process_code_blocks(content)
-        content = self._process_lists(content) 
         content = self._process_links(content)
         content = self._process_images(content)
-        content = self._process_tables(content)
+        content = self._process_lists_and_tables(content)
         content = self._process_headings(content)
         content = self._process_emphasis(content)
         content = self._process_paragraphs(content)
@@ -103,7 +597,7 @@ class MarkdownConverter:
             code_content = re.sub(r'<[^>]+>', '', code_content)
             code_content = html.unescape(code_content)
             
-            return f'\n```{language}\n{code_content.strip()}\n```\n'
+            return f'\n```{language}\n{trim_code_block(code_content)}\n```\n'
         
         # Handle <pre><code> blocks
         content = re.sub(r'<pre[^>]*><code[^>]*>(.*?)</code></pre>', 
@@ -118,37 +612,6 @@ class MarkdownConverter:
         
         return content
     
-    def _process_lists(self, content: str) -> str:
-        """Process ordered and unordered lists."""
-        # Process nested lists recursively
-        def process_list_items(list_content: str, ordered: bool = False) -> str:
-            items = re.findall(r'<li[^>]*>(.*?)</li>', list_content, flags=re.DOTALL | re.IGNORECASE)
-            result = []
-            
-            for i, item in enumerate(items, 1):
-                # Clean the item content
-                item_text = re.sub(r'<[^>]+>', ' ', item)
-                item_text = html.unescape(item_text.strip())
-                
-                if ordered:
-                    result.append(f"{i}. {item_text}")
-                else:
-                    result.append(f"- {item_text}")
-            
-            return '\n'.join(result)
-        
-        # Handle ordered lists
-        content = re.sub(r'<ol[^>]*>(.*?)</ol>', 
-                        lambda m: '\n' + process_list_items(m.group(1), ordered=True) + '\n',
-                        content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Handle unordered lists  
-        content = re.sub(r'<ul[^>]*>(.*?)</ul>',
-                        lambda m: '\n' + process_list_items(m.group(1), ordered=False) + '\n', 
-                        content, flags=re.DOTALL | re.IGNORECASE)
-        
-        return content
-    
     def _process_links(self, content: str) -> str:
         """Process hyperlinks."""
         def replace_link(match):
@@ -191,52 +654,132 @@ class MarkdownConverter:
         
         return content
     
-    def _process_tables(self, content: str) -> str:
-        """Process HTML tables to Markdown format."""
-        def process_table(match):
-            table_content = match.group(0)
-            
-            # Extract table rows
-            rows = re.findall(r'<tr[^>]*>(.*?)</tr>', table_content, flags=re.DOTALL | re.IGNORECASE)
-            if not rows:
-                return ""
+    def _process_lists_and_tables(self, content: str) -> str:
+        """Process lists and tables in one linear, stack-based pass over their tags."""
+        output = []
+        frames = []  # Open lists ({'ordered', 'count'}) and tables ({'rows', 'row', 'cell'})
+        tables = []  # The table frames alone, so the output target is found in constant time
+        open_lists = 0
+        item_start = False  # Just emitted a list marker; drop leading whitespace and breaks
+        
+        def sink() -> Optional[List[str]]:
+            # Innermost open table cell, or the document when no table is open;
+            # text inside a table but outside any cell is dropped
+            return tables[-1]['cell'] if tables else output
+        
+        def trim(parts: List[str]):
+            while parts and not parts[-1].strip():
+                parts.pop()
+            if parts:
+                parts[-1] = parts[-1].rstrip()
+        
+        def close_cell(table: Dict):
+            if table['cell'] is not None:
+                text = html.unescape(self.STRIP_TAGS_RE.sub(' ', ''.join(table['cell'])))
+                if table['row'] is None:
+                    table['row'] = []
+                table['row'].append(' '.join(text.split()))
+                table['cell'] = None
+        
+        def close_row(table: Dict):
+            close_cell(table)
+            if table['row']:
+                table['rows'].append(table['row'])
+            table['row'] = None
+        
+        def close_frame():
+            nonlocal open_lists
+            frame = frames.pop()
+            if 'rows' in frame:
+                tables.pop()
+                close_row(frame)
+                target = sink()
+                if target is not None and tables:
+                    # Markdown has no nested tables; keep the inner table's text in the cell
+                    target.append(' ' + ' '.join(' '.join(row) for row in frame['rows']) + ' ')
+                elif target is not None:
+                    target.append(format_markdown_table(frame['rows']))
+            else:
+                open_lists -= 1
+                target = sink()
+                if target is not None:
+                    trim(target)
+                    target.append('\n')
+        
+        position = 0
+        for match in self.STRUCTURE_TAG_RE.finditer(content):
+            text = content[position:match.start()]
+            position = match.end()
             
-            markdown_rows = []
-            is_header = True
+            target = sink()
+            if text and target is not None:
+                if frames and 'ordered' in frames[-1]:
+                    text = self.ITEM_BREAK_RE.sub(' ', text)
+                if item_start:
+                    text = text.lstrip()
+                    item_start = not text
+                if text:
+                    target.append(text)
             
-            for row in rows:
-                # Extract cells (th or td)
-                cells = re.findall(r'<(?:th|td)[^>]*>(.*?)</(?:th|td)>', row, flags=re.DOTALL | re.IGNORECASE)
-                if not cells:
-                    continue
-                
-                # Clean cell content
-                clean_cells = []
-                for cell in cells:
-                    cell_text = re.sub(r'<[^>]+>', ' ', cell)
-                    cell_text = html.unescape(cell_text.strip())
-                    clean_cells.append(cell_text)
-                
-                # Create markdown row
-                markdown_row = '| ' + ' | '.join(clean_cells) + ' |'
-                markdown_rows.append(markdown_row)
-                
-                # Add header separator after first row
-                if is_header and clean_cells:
-                    separator = '| ' + ' | '.join(['---'] * len(clean_cells)) + ' |'
-                    markdown_rows.append(separator)
-                    is_header = False
+            closing = match.group(1) == '/'
+            tag = match.group(2).lower()
             
-            return '\n' + '\n'.join(markdown_rows) + '\n'
+            if tag in ('ul', 'ol'):
+                if not closing:
+                    if target is not None:
+                        target.append('\n')
+                    frames.append({'ordered': tag == 'ol', 'count': 0})
+                    open_lists += 1
+                    item_start = False
+                elif open_lists:
+                    # Close everything opened inside the list, unclosed tables included
+                    while 'ordered' not in frames[-1]:
+                        close_frame()
+                    close_frame()
+                    item_start = False
+            elif tag == 'li':
+                if not closing and frames and 'ordered' in frames[-1]:
+                    current = frames[-1]
+                    current['count'] += 1
+                    marker = f"{current['count']}." if current['ordered'] else '-'
+                    if target is not None:
+                        trim(target)
+                        target.append('\n' + '  ' * min(open_lists - 1, MAX_LIST_INDENT) + marker + ' ')
+                    item_start = True
+            elif tag == 'table':
+                if not closing:
+                    frames.append({'rows': [], 'row': None, 'cell': None})
+                    tables.append(frames[-1])
+                    item_start = False
+                elif tables:
+                    while 'rows' not in frames[-1]:
+                        close_frame()
+                    close_frame()
+            elif tables and 'rows' in frames[-1]:
+                table = frames[-1]
+                if tag == 'tr':
+                    close_row(table)
+                    if not closing:
+                        table['row'] = []
+                elif closing:
+                    close_cell(table)
+                else:
+                    close_cell(table)
+                    table['cell'] = []
         
-        content = re.sub(r'<table[^>]*>.*?</table>', process_table, content, flags=re.DOTALL | re.IGNORECASE)
-        return content
+        target = sink()
+        if target is not None:
+            target.append(content[position:])
+        while frames:
+            close_frame()
+        
+        return ''.join(output)
     
     def _process_headings(self, content: str) -> str:
         """Process heading tags."""
         for i in range(1, 7):
             pattern = f'<h{i}[^>]*>(.*?)</h{i}>'
-            replacement = '#' * i + ' \\1'
+            replacement = '\n' + '#' * i + ' \\1\n'
             content = re.sub(pattern, replacement, content, flags=re.DOTALL | re.IGNORECASE)
         
         return content
@@ -271,8 +814,32 @@ class MarkdownConverter:
         # Remove excessive blank lines (more than 2)
         content = re.sub(r'\n{3,}', '\n\n', content)
         
-        # Clean up spaces
-        content = re.sub(r'[ \t]+', ' ', content)
+        return self._clean_line_spacing(content).strip()
+    
+    def _clean_line_spacing(self, content: str) -> str:
+        """Clean up spaces within lines, leaving fenced code blocks untouched."""
+        return self._clean_lines_outside_code(content, False)[0]
+    
+    def _clean_lines_outside_code(self, content: str, in_code: bool) -> Tuple[str, bool]:
+        """Apply _clean_prose_spacing to the text outside code fences.
+        
+        in_code says whether content starts inside a fenced block; the return value
+        says whether it ends inside one, so pieces of a document can be cleaned in turn.
+        """
+        # Split keeps the fence lines at odd indexes; each one toggles in_code
+        parts = self.CODE_FENCE_LINE_RE.split(content)
+        for i, part in enumerate(parts):
+            if i % 2:
+                in_code = not in_code
+                parts[i] = part.rstrip()
+            elif not in_code:
+                parts[i] = self._clean_prose_spacing(part)
+        return ''.join(parts), in_code
+    
+    def _clean_prose_spacing(self, content: str) -> str:
+        """Clean up spaces within lines (every rule here is local to a single line)."""
+        # Clean up spaces, keeping the indentation of nested list items
+        content = self.SPACE_RUN_RE.sub(lambda m: m.group(1) or ' ', content)
         
         # Remove trailing whitespace from lines
         content = re.sub(r'[ \t]+$', '', content, flags=re.MULTILINE)
@@ -280,7 +847,39 @@ class MarkdownConverter:
         # Ensure single space after sentence endings
         content = re.sub(r'([.!?])([A-Z])', r'\1 \2', content)
         
-        return content.strip()
+        return content
+    
+    def iter_markdown(self, chunks: Iterable, base_url: str = "", encoding: str = 'utf-8') -> Iterator[str]:
+        """Convert HTML arriving as an iterable of str or bytes chunks, yielding Markdown fragments.
+        
+        Joined, the fragments equal html_to_markdown() of the whole document. The regex
+        engine cannot stream, so it collects the chunks and yields a single fragment.
+        """
+        self.base_url = base_url
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        
+        def decode(chunk) -> str:
+            return decoder.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+        
+        if self.engine != 'stream':
+            markdown_content = self.html_to_markdown(''.join(decode(chunk) for chunk in chunks) + decoder.decode(b'', final=True), base_url)
+            if markdown_content:
+                yield markdown_content
+            return
+        
+        engine = StreamingMarkdownEngine(base_url, self.remove_boilerplate)
+        cleaner = IncrementalWhitespaceCleaner(self)
+        
+        for chunk in chunks:
+            engine.feed(decode(chunk))
+            fragment = cleaner.feed(engine.take_completed())
+            if fragment:
+                yield fragment
+        
+        engine.feed(decoder.decode(b'', final=True))
+        fragment = cleaner.finish(engine.get_markdown())
+        if fragment:
+            yield fragment
     
     def html_to_markdown(self, html_content: str, base_url: str = "") -> str:
         """Convert HTML content to Markdown format."""
@@ -301,22 +900,14 @@ class MarkdownConverter:
             fallback = self._clean_whitespace(fallback)
             return fallback
 
-def convert_html_file(html_file: Path, output_file: Path, base_url: str = "") -> bool:
+# Read size used when streaming files through the converter
+CHUNK_SIZE = 64 * 1024
+
+def convert_html_file(html_file: Path, output_file: Path, base_url: str = "", engine: str = 'stream',
+                      remove_boilerplate: bool = False) -> bool:
     """Convert an HTML file to Markdown."""
     try:
-        converter = MarkdownConverter()
-        
-        with open(html_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        markdown_content = converter.html_to_markdown(html_content, base_url)
-        
-        # Ensure output directory exists
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
-        
+        _convert_file(html_file, output_file, base_url, engine, remove_boilerplate)
         logger.info(f"Converted {html_file} to {output_file}")
         return True
         
@@ -324,16 +915,153 @@ def convert_html_file(html_file: Path, output_file: Path, base_url: str = "") ->
         logger.error(f"Error converting {html_file}: {str(e)}")
         return False
 
-if __name__ == "__main__":
-    import sys
+def _convert_file(html_file: Path, output_file: Path, base_url: str, engine: str,
+                  remove_boilerplate: bool = False):
+    """Convert html_file into output_file, streaming first and converting whole on failure; raises on failure.
+    
+    Output goes to a temporary file that replaces output_file only once it is complete,
+    so a failed conversion never leaves a partial file behind.
+    """
+    try:
+        _stream_html_file(html_file, output_file, base_url, engine, remove_boilerplate)
+    except Exception as e:
+        logger.warning(f"Streaming conversion of {html_file} failed, converting the whole document: {str(e)}")
+        converter = MarkdownConverter(engine=engine, remove_boilerplate=remove_boilerplate)
+        html_content = html_file.read_bytes().decode('utf-8', errors='replace')
+        _write_markdown_file(output_file, [converter.html_to_markdown(html_content, base_url)])
+
+def _stream_html_file(html_file: Path, output_file: Path, base_url: str, engine: str,
+                      remove_boilerplate: bool = False):
+    """Stream an HTML file through the converter into output_file; raises on failure."""
+    converter = MarkdownConverter(engine=engine, remove_boilerplate=remove_boilerplate)
+    
+    # Stream the file through the converter so neither document is held in memory whole
+    with open(html_file, 'rb') as source:
+        chunks = iter(lambda: source.read(CHUNK_SIZE), b'')
+        _write_markdown_file(output_file, converter.iter_markdown(chunks, base_url))
+
+def _write_markdown_file(output_file: Path, fragments: Iterable[str]):
+    """Write fragments to a temporary file next to output_file, then rename it into place."""
+    # Ensure output directory exists
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    fd, temp_path = tempfile.mkstemp(dir=str(output_file.parent), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for fragment in fragments:
+                f.write(fragment)
+        os.replace(temp_path, output_file)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+# File suffixes picked up when a batch input is a directory
+HTML_SUFFIXES = ('.html', '.htm')
+
+def collect_batch_inputs(source: Path) -> Tuple[Path, List[Tuple[Path, str]]]:
+    """Resolve a batch source into (root, [(html_file, base_url)]).
+    
+    A directory contributes every HTML file below it. Any other file is read as a
+    manifest: one HTML path per line, optionally followed by whitespace and a base URL;
+    blank lines and lines starting with # are skipped.
+    """
+    if source.is_dir():
+        files = sorted(path for path in source.rglob('*')
+                       if path.is_file() and path.suffix.lower() in HTML_SUFFIXES)
+        return source, [(path, '') for path in files]
+    
+    entries = []
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split(None, 1)
+            path = Path(parts[0])
+            if not path.is_absolute():
+                path = source.parent / path
+            entries.append((path, parts[1] if len(parts) > 1 else ''))
+    
+    root = Path(os.path.commonpath([str(path.parent) for path, _ in entries])) if entries else source.parent
+    return root, entries
+
+def _convert_batch_item(task: Tuple[str, str, str, str, bool]) -> Tuple[str, Optional[str]]:
+    """Process-pool worker: convert one file and return (input, error or None)."""
+    html_file, output_file, base_url, engine, remove_boilerplate = task
+    try:
+        _convert_file(Path(html_file), Path(output_file), base_url, engine, remove_boilerplate)
+        return html_file, None
+    except Exception as e:
+        return html_file, f"{type(e).__name__}: {str(e)}"
+
+def convert_batch(source: Path, output_dir: Path, base_url: str = "", engine: str = 'stream',
+                  workers: Optional[int] = None, chunk_size: int = 8,
+                  remove_boilerplate: bool = False) -> Dict[str, Optional[str]]:
+    """Convert a directory or manifest of HTML files across a process pool.
     
-    if len(sys.argv) < 3:
-        print("Usage: python markdown-converter.py <input.html> <output.md> [base_url]")
+    Outputs mirror the input tree under output_dir with a .md suffix. Returns
+    {input path: error message or None}; one file failing never stops the others.
+    """
+    root, entries = collect_batch_inputs(source)
+    tasks = []
+    for html_file, file_base_url in entries:
+        relative = html_file.relative_to(root)
+        tasks.append((str(html_file), str((output_dir / relative).with_suffix('.md')),
+                      file_base_url or base_url, engine, remove_boilerplate))
+    
+    results = {}
+    if not tasks:
+        return results
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for html_file, error in executor.map(_convert_batch_item, tasks, chunksize=max(1, chunk_size)):
+                results[html_file] = error
+                if error:
+                    logger.error(f"Error converting {html_file}: {error}")
+    except BrokenProcessPool as e:
+        # A worker died outright (e.g. killed for memory); report what never finished
+        for task in tasks:
+            results.setdefault(task[0], f"worker pool failed: {str(e)}")
+    
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert HTML to AI-friendly Markdown")
+    parser.add_argument('input', nargs='?', help="Input HTML file (with --batch: directory or manifest)")
+    parser.add_argument('output', nargs='?', help="Output Markdown file (with --batch: output directory)")
+    parser.add_argument('base_url', nargs='?', default="", help="Base URL for resolving relative links")
+    parser.add_argument('--engine', choices=MarkdownConverter.ENGINES, default='stream',
+                        help="Conversion engine (default: stream)")
+    parser.add_argument('--remove-boilerplate', action='store_true',
+                        help="Drop navigation, footers and other link-dense blocks (stream engine)")
+    parser.add_argument('--batch', action='store_true',
+                        help="Convert every HTML file in a directory or manifest, mirroring the tree")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --batch (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=8,
+                        help="Files handed to a worker per task for --batch (default: 8)")
+    args = parser.parse_args()
+    
+    if not args.input or not args.output:
+        parser.print_usage()
         sys.exit(1)
     
-    input_file = Path(sys.argv[1])
-    output_file = Path(sys.argv[2])
-    base_url = sys.argv[3] if len(sys.argv) > 3 else ""
+    if args.batch:
+        results = convert_batch(Path(args.input), Path(args.output), args.base_url, args.engine,
+                                args.workers, args.chunk_size, args.remove_boilerplate)
+        failures = {path: error for path, error in results.items() if error}
+        for path, error in sorted(failures.items()):
+            print(f"FAIL {path}: {error}")
+        print(f"Converted {len(results) - len(failures)}/{len(results)} files, {len(failures)} failed")
+        sys.exit(1 if failures else 0)
     
-    success = convert_html_file(input_file, output_file, base_url)
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    success = convert_html_file(Path(args.input), Path(args.output), args.base_url, args.engine,
+                                args.remove_boilerplate)
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
@@ -11,24 +11,41 @@ import re
 import json
 import time
 import subprocess
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import logging
 from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import tempfile
-
-# Import the existing docs fetcher
-try:
-    from docs_fetch import DocsFetcher
-except ImportError:
-    # If import fails, try to run the existing script directly
-    DocsFetcher = None
+import importlib.util
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# docs-fetch.py lives next to this script; its hyphenated name rules out a plain import
+DOCS_FETCH_PATH = Path(__file__).parent / "docs-fetch.py"
+
+def load_docs_fetcher_class():
+    """Import DocsFetcher from docs-fetch.py; returns None if it cannot be loaded."""
+    try:
+        spec = importlib.util.spec_from_file_location('docs_fetch', DOCS_FETCH_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.DocsFetcher
+    except Exception as e:
+        logger.warning(f"Could not import docs-fetch.py, libraries will run in subprocesses: {str(e)}")
+        return None
+
+DocsFetcher = load_docs_fetcher_class()
+
+# Batch options that are not passed on to DocsFetcher.fetch_documentation
+BATCH_ONLY_OPTIONS = {'dry-run', 'parallel', 'workers', 'skip-existing', 'isolate', 'format', 'file', 'section'}
+
+# Seconds a library's fetch may take before it is reported as failed
+LIBRARY_TIMEOUT_SECONDS = 300
+
 class MarkdownParser:
     """Parses markdown content to extract library information."""
 
@@ -282,9 +299,27 @@ class BatchDocsFetcher:
 
     def __init__(self):
         self.parser = MarkdownParser()
+        # One in-process fetcher for the whole batch, so every library shares its HTTP pool,
+        # rate limiter, site patterns, caches and agent pool. Created on the first in-process
+        # fetch, so --dry-run and --isolate runs never build it.
         self.docs_fetcher = None
-        if DocsFetcher:
-            self.docs_fetcher = DocsFetcher()
+        self._docs_fetcher_lock = threading.Lock()
+
+    def get_docs_fetcher(self):
+        """Return the in-process DocsFetcher, creating it on first use."""
+        with self._docs_fetcher_lock:
+            if self.docs_fetcher is None:
+                self.docs_fetcher = DocsFetcher()
+            return self.docs_fetcher
+
+    def _fetches_in_process(self, options: Dict) -> bool:
+        """True when libraries go through the shared in-process DocsFetcher."""
+        return DocsFetcher is not None and not options.get('isolate', False)
+
+    def close(self):
+        """Release the in-process fetcher's connections and agent threads."""
+        if self.docs_fetcher:
+            self.docs_fetcher.close()
 
     def parse_arguments(self, args_string: str) -> Tuple[str, Dict]:
         """Parse command line arguments from string."""
@@ -375,8 +410,50 @@ class BatchDocsFetcher:
 
         return '\n'.join(section_lines)
 
-    def _call_docs_fetch_command(self, library_name: str, version: str = None, url: str = None, format_option: str = None) -> bool:
-        """Call the existing docs:fetch command for a single library."""
+    def _fetch_library(self, lib: Dict, options: Dict) -> bool:
+        """Fetch one library in process, or in a docs-fetch.py subprocess with --isolate."""
+        if not self._fetches_in_process(options):
+            return self._call_docs_fetch_command(
+                lib['mapped_name'],
+                lib['version'],
+                lib['url'],
+                options.get('format'),
+                bool(options.get('update'))
+            )
+
+        fetch_options = dict(self._shared_fetch_options(options), **self._library_fetch_options(lib))
+
+        try:
+            success = self.get_docs_fetcher().fetch_documentation(lib['mapped_name'], **fetch_options)
+        except Exception as e:
+            logger.error(f"❌ Error fetching documentation for {lib['mapped_name']}: {str(e)}")
+            return False
+
+        if success:
+            logger.info(f"✅ Successfully fetched documentation for {lib['mapped_name']}")
+        else:
+            logger.error(f"❌ Failed to fetch documentation for {lib['mapped_name']}")
+        return success
+
+    def _shared_fetch_options(self, options: Dict) -> Dict:
+        """Return the batch options that apply to every library's fetch."""
+        return {flag: value for flag, value in options.items() if flag not in BATCH_ONLY_OPTIONS}
+
+    def _library_fetch_options(self, lib: Dict) -> Dict:
+        """Return the fetch options specific to one library (version and URL from the list)."""
+        library_options = {}
+        if lib['version']:
+            library_options['version'] = lib['version']
+        if lib['url']:
+            library_options['url'] = lib['url']
+        return library_options
+
+    def _call_docs_fetch_command(self, library_name: str, version: str = None, url: str = None, format_option: str = None, update: bool = False) -> bool:
+        """Call the existing docs:fetch command for a single library.
+
+        With update=True the library's stored sources are revalidated and only changed
+        pages are re-processed.
+        """
         try:
             cmd = ['python3', '.claude/scripts/docs-fetch.py', library_name]
 
@@ -386,9 +463,11 @@ class BatchDocsFetcher:
                 cmd.extend(['--url', url])
             if format_option:
                 cmd.extend(['--format', format_option])
+            if update:
+                cmd.append('--update')
 
             # Run the command
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=LIBRARY_TIMEOUT_SECONDS)
 
             if result.returncode == 0:
                 logger.info(f"✅ Successfully fetched documentation for {library_name}")
@@ -434,7 +513,8 @@ class BatchDocsFetcher:
             skipped = []
 
             if options.get('parallel', False):
-                successful, failed, skipped = self._process_libraries_parallel(libraries, options)
+                workers = max(1, int(options.get('workers', 3)))
+                successful, failed, skipped = self._process_libraries_parallel(libraries, options, workers)
             else:
                 successful, failed, skipped = self._process_libraries_sequential(libraries, options)
 
@@ -460,19 +540,14 @@ class BatchDocsFetcher:
         for i, lib in enumerate(libraries, 1):
             print(f"\n[{i}/{len(libraries)}] Processing {lib['display_name']}...")
 
-            # Check if should skip existing
-            if options.get('skip-existing', False) and self._documentation_exists(lib['mapped_name']):
+            # Check if should skip existing (--update refreshes existing documentation instead)
+            if self._should_skip(lib, options):
                 print(f"  ⏭️  Skipping {lib['mapped_name']} - documentation already exists")
                 skipped.append(lib)
                 continue
 
             # Fetch documentation
-            success = self._call_docs_fetch_command(
-                lib['mapped_name'],
-                lib['version'],
-                lib['url'],
-                options.get('format')
-            )
+            success = self._fetch_library(lib, options)
 
             if success:
                 successful.append(lib)
@@ -482,7 +557,13 @@ class BatchDocsFetcher:
         return successful, failed, skipped
 
     def _process_libraries_parallel(self, libraries: List[Dict], options: Dict, max_workers: int = 3) -> Tuple[List[Dict], List[Dict], List[Dict]]:
-        """Process libraries in parallel."""
+        """Process libraries in parallel.
+
+        In process, all libraries go through DocsFetcher's shared scheduler, which splits
+        them into page tasks interleaved across domains; with --isolate each library runs
+        in its own docs-fetch.py process, max_workers at a time. Either way a library
+        that takes longer than LIBRARY_TIMEOUT_SECONDS fails.
+        """
         successful = []
         failed = []
         skipped = []
@@ -490,7 +571,7 @@ class BatchDocsFetcher:
         # Filter out libraries to skip
         to_process = []
         for lib in libraries:
-            if options.get('skip-existing', False) and self._documentation_exists(lib['mapped_name']):
+            if self._should_skip(lib, options):
                 print(f"  ⏭️  Skipping {lib['mapped_name']} - documentation already exists")
                 skipped.append(lib)
             else:
@@ -499,18 +580,29 @@ class BatchDocsFetcher:
         if not to_process:
             return successful, failed, skipped
 
+        if self._fetches_in_process(options):
+            print(f"\n🔄 Processing {len(to_process)} libraries as page tasks across {max_workers} workers...")
+            results = self.get_docs_fetcher().fetch_documentation_batch(
+                [(lib['mapped_name'], self._library_fetch_options(lib)) for lib in to_process],
+                workers=max_workers,
+                library_timeout=LIBRARY_TIMEOUT_SECONDS,
+                **self._shared_fetch_options(options)
+            )
+            for lib in to_process:
+                if results.get(lib['mapped_name']):
+                    successful.append(lib)
+                    print(f"  ✅ Completed {lib['mapped_name']}")
+                else:
+                    failed.append(lib)
+                    print(f"  ❌ Failed {lib['mapped_name']}")
+            return successful, failed, skipped
+
         print(f"\n🔄 Processing {len(to_process)} libraries in parallel (max {max_workers} workers)...")
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Submit all tasks
             future_to_lib = {
-                executor.submit(
-                    self._call_docs_fetch_command,
-                    lib['mapped_name'],
-                    lib['version'],
-                    lib['url'],
-                    options.get('format')
-                ): lib for lib in to_process
+                executor.submit(self._fetch_library, lib, options): lib for lib in to_process
             }
 
             # Process completed tasks
@@ -530,6 +622,12 @@ class BatchDocsFetcher:
 
         return successful, failed, skipped
 
+    def _should_skip(self, lib: Dict, options: Dict) -> bool:
+        """Return True when --skip-existing applies and the library already has documentation."""
+        if options.get('update', False):
+            return False
+        return options.get('skip-existing', False) and self._documentation_exists(lib['mapped_name'])
+
     def _documentation_exists(self, library_name: str) -> bool:
         """Check if documentation already exists for a library."""
         base_dir = Path('/workspace/docs')
@@ -590,8 +688,10 @@ def main():
         print("Options:")
         print("  --dry-run       Show what would be fetched without actually fetching")
         print("  --parallel      Process libraries in parallel (faster)")
+        print("  --workers N     Worker count for --parallel (default 3)")
         print("  --skip-existing Skip libraries that already have documentation")
-        print("  --update        Update existing documentation")
+        print("  --update        Refresh existing documentation, re-processing only changed pages")
+        print("  --isolate       Run each library in its own docs-fetch.py process")
         print("  --format FORMAT Output format (full, minimal, api-only)")
         print("  --file PATH     Read markdown from file")
         print("  --section NAME  Extract specific section from file")
@@ -620,6 +720,8 @@ def main():
         logger.error(f"Error: {str(e)}")
         print(f"\n❌ Error: {str(e)}")
         sys.exit(1)
+    finally:
+        fetcher.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Time ContentQualityValidator metrics on large synthetic API reference pages.
+
+Compares the block scan in docs-fetch.py with one full-page pass per metric:
+    python tests/scripts/benchmark_content_quality.py [size_mb ...]
+"""
+
+import sys
+import time
+
+from conftest import load_script
+from test_content_quality import SECTION, whole_page_metrics
+
+
+def best_of(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(sizes_mb=(1, 5, 10), repeat=3):
+    validator = load_script('docs-fetch.py', 'docs_fetch').ContentQualityValidator()
+
+    print(f"{'Size':>8}  {'Block scan':>12}  {'Per metric':>12}")
+    for size_mb in sizes_mb:
+        page = '<html><body><main>' + SECTION * int(size_mb * 1024 * 1024 / len(SECTION)) + '</main></body></html>'
+        block_scan = best_of(repeat, validator._calculate_content_metrics, page)
+        per_metric = best_of(repeat, whole_page_metrics, validator, page)
+        print(f"{len(page) / 1048576:>6.1f}MB  {block_scan * 1000:>10.1f}ms  {per_metric * 1000:>10.1f}ms")
+
+
+if __name__ == '__main__':
+    main(tuple(float(size) for size in sys.argv[1:]) or (1, 5, 10))
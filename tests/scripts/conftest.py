@@ -0,0 +1,120 @@
+"""Shared fixtures for the documentation fetch scripts in claude/scripts."""
+
+import importlib.util
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / 'claude' / 'scripts'
+
+
+def load_script(filename, module_name):
+    """Import a hyphenated script from claude/scripts once per test session."""
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+
+@pytest.fixture(scope='session')
+def markdown_converter():
+    return load_script('markdown-converter.py', 'markdown_converter')
+
+
+@pytest.fixture(scope='session')
+def docs_fetch():
+    return load_script('docs-fetch.py', 'docs_fetch')
+
+
+@pytest.fixture(scope='session')
+def docs_fetch_batch():
+    return load_script('docs-fetch-batch.py', 'docs_fetch_batch')
+
+
+class LocalServer:
+    """Threaded HTTP server on 127.0.0.1 serving per-test routes.
+
+    A route is a callable taking the request handler; it writes the whole response.
+    Every request is logged as (method, path, headers) in ``requests``, and every
+    accepted TCP connection is counted in ``connections``.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                server.connections += 1
+                super().setup()
+
+            def _dispatch(self):
+                server.requests.append((self.command, self.path, dict(self.headers)))
+                route = server.routes.get(self.path.split('?')[0])
+                if route is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                route(self)
+
+            do_GET = do_HEAD = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def requests_for(self, path):
+        return [request for request in self.requests if request[1].split('?')[0] == path]
+
+
+def send_body(handler, body, status=200, headers=None, content_type='text/html; charset=utf-8'):
+    """Write a complete response with a Content-Length header (HEAD gets headers only)."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    handler.send_response(status)
+    handler.send_header('Content-Type', content_type)
+    handler.send_header('Content-Length', str(len(body)))
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
+    handler.end_headers()
+    if handler.command != 'HEAD':
+        handler.wfile.write(body)
+
+
+@pytest.fixture
+def http_server():
+    server = LocalServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def fetcher(docs_fetch, tmp_path):
+    """A DocsFetcher writing under tmp_path, without rate limit delays or agent calls."""
+    fetcher = docs_fetch.DocsFetcher(base_dir=str(tmp_path / 'docs'))
+    fetcher.rate_limiter.delay = 0
+    fetcher.enable_agent_integration = False
+    yield fetcher
+    fetcher.close()
@@ -0,0 +1,25 @@
+"""Splitting large pages into agent chunks and merging the organized chunks back."""
+
+import pytest
+
+# Pages whose re-leveled merge must reproduce them exactly: (name, markdown, max_chars)
+CHUNKING_CASES = [
+    ('mixed-depth-packed', '# Top\n\nIntro.\n\n### Deep\n\nDetail.\n\n## B\n\nMore.\n', 300),
+    ('preamble-then-deep', 'Preamble text.\n\n### Deep\n\nDetail.\n\n## B\n\nMore.\n', 300),
+    ('deep-first-split', '### Deep\n\n' + 'Line of text.\n\n' * 30 + '# Top\n\nEnd.\n', 200),
+    ('fenced-heading', '## Code\n\n```sh\n# not a heading\n```\n\n# Real\n\nText.\n', 300),
+]
+
+
+@pytest.mark.parametrize('name,markdown,max_chars', CHUNKING_CASES, ids=[case[0] for case in CHUNKING_CASES])
+def test_unchanged_chunks_merge_to_original(docs_fetch, name, markdown, max_chars):
+    chunks = docs_fetch.split_markdown_chunks(markdown, max_chars)
+    assert docs_fetch.merge_organized_chunks(chunks, [chunk['text'] for chunk in chunks]) == markdown
+
+
+@pytest.mark.parametrize('name,markdown,max_chars', CHUNKING_CASES, ids=[case[0] for case in CHUNKING_CASES])
+def test_releveled_chunks_merge_to_original(docs_fetch, name, markdown, max_chars):
+    # Agents may re-level headings arbitrarily; shift each chunk to start at level 2
+    chunks = docs_fetch.split_markdown_chunks(markdown, max_chars)
+    outputs = [docs_fetch.merge_organized_chunks([dict(chunk, level=2)], [chunk['text']]) for chunk in chunks]
+    assert docs_fetch.merge_organized_chunks(chunks, outputs) == markdown
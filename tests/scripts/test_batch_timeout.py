@@ -0,0 +1,70 @@
+"""Per-library timeout of the shared in-process batch pipeline."""
+
+import time
+
+from conftest import send_body
+from test_update import DOCUMENT
+
+
+def slow_page(delay):
+    def route(handler):
+        time.sleep(delay)
+        send_body(handler, DOCUMENT)
+    return route
+
+
+def test_library_past_its_timeout_fails_without_blocking_others(fetcher, http_server):
+    http_server.routes['/fast'] = lambda handler: send_body(handler, DOCUMENT)
+    http_server.routes['/slow'] = slow_page(1.0)
+
+    results = fetcher.fetch_documentation_batch(
+        [('fastlib', {'url': http_server.url('/fast')}), ('slowlib', {'url': http_server.url('/slow')})],
+        workers=2, library_timeout=0.5)
+
+    assert results == {'fastlib': True, 'slowlib': False}
+    assert not list(fetcher.base_dir.glob('*/slowlib/*.md'))
+
+
+def test_stuck_planning_is_abandoned_at_the_deadline(fetcher, http_server, monkeypatch):
+    http_server.routes['/fast'] = lambda handler: send_body(handler, DOCUMENT)
+    plan_library = fetcher._plan_library
+
+    def stuck_plan(library_name, options):
+        if library_name == 'stucklib':
+            time.sleep(2)
+        return plan_library(library_name, options)
+
+    monkeypatch.setattr(fetcher, '_plan_library', stuck_plan)
+    start = time.monotonic()
+    results = fetcher.fetch_documentation_batch(
+        [('stucklib', {'url': http_server.url('/fast')}), ('fastlib', {'url': http_server.url('/fast')})],
+        workers=2, library_timeout=0.3)
+
+    assert results == {'stucklib': False, 'fastlib': True}
+    assert time.monotonic() - start < 1.5
+
+
+def test_without_timeout_slow_libraries_complete(fetcher, http_server):
+    http_server.routes['/slow'] = slow_page(0.3)
+
+    results = fetcher.fetch_documentation_batch([('slowlib', {'url': http_server.url('/slow')})])
+
+    assert results == {'slowlib': True}
+
+
+def test_parallel_batch_passes_the_library_timeout(docs_fetch_batch, monkeypatch):
+    calls = []
+
+    class Fetcher:
+        def fetch_documentation_batch(self, requests, **options):
+            calls.append(options)
+            return {library_name: True for library_name, _ in requests}
+
+    batch = docs_fetch_batch.BatchDocsFetcher()
+    monkeypatch.setattr(batch, 'get_docs_fetcher', Fetcher)
+    lib = {'display_name': 'Lib', 'mapped_name': 'lib', 'version': None, 'url': 'https://example.com/docs'}
+
+    successful, failed, _ = batch._process_libraries_parallel([lib], {}, max_workers=2)
+
+    assert (successful, failed) == ([lib], [])
+    assert calls[0]['library_timeout'] == docs_fetch_batch.LIBRARY_TIMEOUT_SECONDS
@@ -0,0 +1,45 @@
+"""ContentQualityValidator metrics collected block by block."""
+
+import re
+
+import pytest
+
+SECTION = (
+    '<h2 id="method">method()</h2><p>Reference documentation for this API function, '
+    'with parameter and usage details.</p><pre><code class="language-js">api.method(1)</code></pre>'
+    '<table><tr><td><a href="#param">param</a></td><td>Parameter description</td></tr></table>\n'
+)
+
+PAGES = {
+    'api-reference': '<html><body><main>' + SECTION * 40 + '</main></body></html>',
+    'js-shell': '<div id="root">Loading...</div><noscript>Please enable JavaScript</noscript>' * 20,
+    'unclosed-tag-at-end': '<h1>Guide</h1><p>' + 'Install the package. ' * 30 + '<a href="/x"',
+    'text-only': 'Configuration example without any markup. ' * 20,
+}
+
+
+def whole_page_metrics(validator, content):
+    """Reference metrics computed with one full-page pass per metric."""
+    content_lower = content.lower()
+    text = re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', ' ', content)).strip()
+    return {
+        'length': len(content),
+        'headings': len(validator.HEADING_RE.findall(content)),
+        'code_blocks': len(validator.CODE_BLOCK_RE.findall(content)),
+        'links': len(validator.LINK_RE.findall(content)),
+        'paragraphs': len(validator.PARAGRAPH_RE.findall(content)),
+        'documentation_keywords': sum(content_lower.count(keyword) for keyword in validator.DOC_KEYWORDS),
+        'js_loading_indicators': sum(content_lower.count(indicator) for indicator in validator.JS_INDICATORS),
+        'text_length': min(len(text), validator.quality_thresholds['min_text_length']),
+    }
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 64, 64 * 1024])
+@pytest.mark.parametrize('name', PAGES)
+def test_block_metrics_match_whole_page(docs_fetch, monkeypatch, name, block_size):
+    validator = docs_fetch.ContentQualityValidator()
+    monkeypatch.setattr(validator, 'SCAN_BLOCK_SIZE', block_size)
+    metrics = validator._calculate_content_metrics(PAGES[name])
+    # Text is only measured up to the threshold
+    metrics['text_length'] = min(metrics['text_length'], validator.quality_thresholds['min_text_length'])
+    assert metrics == whole_page_metrics(validator, PAGES[name])
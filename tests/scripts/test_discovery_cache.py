@@ -0,0 +1,53 @@
+"""DiscoveryCache merges concurrent writers instead of keeping the last one."""
+
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+
+WRITER = '''
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location('docs_fetch', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+index = sys.argv[3]
+for round in range(10):
+    cache = module.DiscoveryCache(module.Path(sys.argv[2]))
+    cache.get_urls('warm-up')  # Load the file before the other writers save
+    cache.mark_failed(f'https://example.com/missing/{index}/{round}')
+    cache.store_urls(f'lib-{index}-{round}', [f'https://example.com/{index}/{round}'])
+'''
+
+
+def test_concurrent_processes_keep_each_others_entries(docs_fetch, tmp_path):
+    cache_file = tmp_path / 'discovery.json'
+    writers = [
+        subprocess.Popen([sys.executable, '-c', WRITER, str(SCRIPTS_DIR / 'docs-fetch.py'), str(cache_file), str(i)])
+        for i in range(4)
+    ]
+    assert all(writer.wait(timeout=60) == 0 for writer in writers)
+
+    cache = docs_fetch.DiscoveryCache(cache_file)
+    for i in range(4):
+        for round in range(10):
+            assert cache.get_urls(f'lib-{i}-{round}') == [f'https://example.com/{i}/{round}']
+            assert cache.is_known_failure(f'https://example.com/missing/{i}/{round}')
+
+
+def test_invalidation_and_cleared_failures_survive_merge(docs_fetch, tmp_path):
+    cache_file = tmp_path / 'discovery.json'
+    first = docs_fetch.DiscoveryCache(cache_file)
+    second = docs_fetch.DiscoveryCache(cache_file)
+    first.store_urls('react', ['https://react.dev/reference'])
+    first.mark_failed('https://react.dev/docs', save=True)
+    second.get_urls('react')
+
+    # The second process sees the URL start failing; the first one finds the old URL again
+    second.invalidate_url('https://react.dev/reference')
+    first.store_urls('vue', ['https://react.dev/docs'])
+
+    cache = docs_fetch.DiscoveryCache(cache_file)
+    assert cache.get_urls('react') is None
+    assert cache.is_known_failure('https://react.dev/reference')
+    assert cache.get_urls('vue') == ['https://react.dev/docs']
+    assert not cache.is_known_failure('https://react.dev/docs')
@@ -0,0 +1,51 @@
+"""Discovery probes stop once AsyncFetchEngine.first_matches has its answer."""
+
+import threading
+import time
+
+from conftest import send_body
+
+
+def test_outstanding_checks_are_aborted_once_quota_is_met(docs_fetch):
+    started = []
+    finished = []
+
+    def check(url, abort):
+        started.append(url)
+        if url.endswith('/first'):
+            return True
+        abort.wait(10)  # A slow probe; it returns as soon as the answer is settled
+        finished.append(time.monotonic())
+        return True
+
+    engine = docs_fetch.AsyncFetchEngine(max_concurrency=3, per_host_limit=3)
+    urls = ['http://example.com/first'] + [f'http://example.com/slow/{i}' for i in range(20)]
+    assert engine.first_matches(urls, check, quota=1) == ['http://example.com/first']
+    returned = time.monotonic()
+
+    deadline = returned + 2
+    while len(finished) < len(started) - 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Checks in flight wake up promptly; the rest of the queue never starts (one slot may
+    # be refilled before the first result is collected)
+    assert len(finished) == len(started) - 1
+    assert all(at - returned < 1 for at in finished)
+    assert len(started) <= 4
+
+
+def test_aborted_probe_sends_nothing_and_records_nothing(fetcher, http_server):
+    http_server.routes['/missing'] = lambda handler: send_body(handler, '', status=404)
+    abort = threading.Event()
+    abort.set()
+
+    assert not fetcher._probe_url(http_server.url('/missing'), abort)
+    assert http_server.requests == []
+    assert not fetcher.discovery_cache.is_known_failure(http_server.url('/missing'))
+
+
+def test_probe_records_missing_url(fetcher, http_server):
+    http_server.routes['/missing'] = lambda handler: send_body(handler, '', status=404)
+
+    assert not fetcher._probe_url(http_server.url('/missing'), threading.Event())
+    assert [request[0] for request in http_server.requests] == ['HEAD']
+    assert fetcher.discovery_cache.is_known_failure(http_server.url('/missing'))
@@ -0,0 +1,84 @@
+"""HttpConnectionPool against a local HTTP server: keep-alive, content decoding and deadlines."""
+
+import gzip
+import socket
+import time
+import zlib
+
+import pytest
+
+from conftest import send_body
+
+
+@pytest.fixture
+def pool(docs_fetch):
+    pool = docs_fetch.HttpConnectionPool()
+    yield pool
+    pool.close()
+
+
+def test_keep_alive_reuses_one_connection(pool, http_server):
+    http_server.routes['/page'] = lambda handler: send_body(handler, 'hello')
+
+    bodies = [pool.request('GET', http_server.url('/page')).body for _ in range(5)]
+
+    assert bodies == [b'hello'] * 5
+    assert len(http_server.requests) == 5
+    assert http_server.connections == 1
+
+
+def test_connection_closed_by_server_is_not_reused(pool, http_server):
+    http_server.routes['/close'] = lambda handler: send_body(handler, 'bye', headers={'Connection': 'close'})
+
+    for _ in range(3):
+        assert pool.request('GET', http_server.url('/close')).body == b'bye'
+    assert http_server.connections == 3
+
+
+@pytest.mark.parametrize('encoding,encode', [
+    ('gzip', gzip.compress),
+    ('deflate', zlib.compress),
+    ('deflate', lambda data: zlib.compress(data)[2:-4]),  # Raw deflate stream, as some servers send
+])
+def test_compressed_bodies_are_decoded(pool, http_server, encoding, encode):
+    page = '<h1>Compressed</h1>' * 100
+    http_server.routes['/page'] = lambda handler: send_body(
+        handler, encode(page.encode('utf-8')), headers={'Content-Encoding': encoding})
+
+    response = pool.request('GET', http_server.url('/page'), headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert response.text() == page
+
+
+def test_redirects_are_followed_within_one_pool(pool, http_server):
+    http_server.routes['/old'] = lambda handler: send_body(handler, '', status=301, headers={'Location': '/new'})
+    http_server.routes['/new'] = lambda handler: send_body(handler, 'moved')
+
+    response = pool.request('GET', http_server.url('/old'))
+
+    assert (response.status, response.url, response.body) == (200, http_server.url('/new'), b'moved')
+    assert http_server.connections == 1
+
+
+def trickle(handler):
+    # Sends a byte every 0.2s, so no single socket read ever times out
+    handler.send_response(200)
+    handler.send_header('Content-Length', '100')
+    handler.end_headers()
+    try:
+        for _ in range(100):
+            handler.wfile.write(b'x')
+            handler.wfile.flush()
+            time.sleep(0.2)
+    except OSError:
+        pass
+
+
+def test_deadline_bounds_a_trickling_body(pool, http_server):
+    http_server.routes['/trickle'] = trickle
+
+    start = time.monotonic()
+    with pytest.raises(socket.timeout):
+        pool.request('GET', http_server.url('/trickle'), timeout=1)
+
+    assert time.monotonic() - start < 2
@@ -0,0 +1,239 @@
+"""Conversion corpus shared by every markdown-converter.py engine."""
+
+import time
+
+import pytest
+
+from conftest import load_script
+
+ENGINES = load_script('markdown-converter.py', 'markdown_converter').MarkdownConverter.ENGINES
+
+BASE_URL = 'https://example.com/'
+
+# Chunk sizes the stream engine is fed in; joined output must equal whole-document conversion
+STREAMING_CHUNK_SIZES = (1, 5, 7, 33, 64)
+
+# Shared expectations every engine must meet (compared after normalize_markdown)
+CONVERSION_CORPUS = [
+    {
+        'name': 'headings-and-paragraphs',
+        'html': '<h1>Title</h1><p>First paragraph.</p><h3>Section</h3><p>Second paragraph.</p>',
+        'expected': '# Title\nFirst paragraph.\n### Section\nSecond paragraph.',
+    },
+    {
+        'name': 'emphasis-and-inline-code',
+        'html': '<p>Use <strong>bold</strong>, <em>italic</em> and <code>run()</code>.</p>',
+        'expected': 'Use **bold**, *italic* and `run()`.',
+    },
+    {
+        'name': 'code-block-language',
+        'html': '<pre><code class="language-python">def add(a, b):\n    return a + b</code></pre>',
+        'expected': '```python\ndef add(a, b):\n    return a + b\n```',
+    },
+    {
+        'name': 'nested-lists-and-indented-code',
+        'html': ('<ul><li>Setup<ul><li>Install <code>pkg</code><ol><li>Download</li><li>Run</li></ol></li>'
+                 '<li>Configure</li></ul></li><li>Use</li></ul><p>Example:</p>'
+                 '<pre>\n    indented first\nclass A:\n    def f(self):\n        return  1.Done</pre>'),
+        'expected': ('- Setup\n  - Install `pkg`\n    1. Download\n    2. Run\n  - Configure\n- Use\nExample:\n'
+                     '```\n    indented first\nclass A:\n    def f(self):\n        return  1.Done\n```'),
+    },
+    {
+        'name': 'unordered-list',
+        'html': '<ul><li>One</li><li>Two</li><li>Three</li></ul>',
+        'expected': '- One\n- Two\n- Three',
+    },
+    {
+        'name': 'ordered-list',
+        'html': '<ol><li>First</li><li>Second</li></ol>',
+        'expected': '1. First\n2. Second',
+    },
+    {
+        'name': 'links',
+        'html': '<p>See <a href="/docs/api">the API</a> or <a href="#">top</a>.</p>',
+        'expected': 'See [the API](https://example.com/docs/api) or top.',
+    },
+    {
+        'name': 'images',
+        'html': '<p><img src="/logo.png" alt="Logo"> <img src="https://cdn.example.com/x.png"></p>',
+        'expected': '![Logo](https://example.com/logo.png) ![Image](https://cdn.example.com/x.png)',
+    },
+    {
+        'name': 'table',
+        'html': '<table><tr><th>Name</th><th>Type</th></tr><tr><td>id</td><td>int</td></tr></table>',
+        'expected': '| Name | Type |\n| --- | --- |\n| id | int |',
+    },
+    {
+        'name': 'scripts-styles-comments',
+        'html': '<style>p { color: red; }</style><p>Kept</p><script>alert(1)</script><!-- hidden -->',
+        'expected': 'Kept',
+    },
+    {
+        'name': 'entities',
+        'html': '<p>a &lt; b &amp;&amp; c &gt; d</p>',
+        'expected': 'a < b && c > d',
+    },
+    {
+        'name': 'boilerplate-navigation',
+        'remove_boilerplate': True,
+        'html': ('<nav><a href="/">Home</a> <a href="/docs">Docs</a> <a href="/blog">Blog</a></nav>'
+                 '<div class="doc-content"><h1>Install</h1><p>Run the installer and check the version.</p></div>'
+                 '<div class="cookie-banner">We use cookies. <button>Accept</button></div>'
+                 '<footer><a href="/terms">Terms</a> <a href="/privacy">Privacy</a></footer>'),
+        # The cookie banner has no links, so it is not dropped
+        'expected': '# Install\nRun the installer and check the version.\nWe use cookies. Accept',
+    },
+    {
+        'name': 'boilerplate-link-farm',
+        'remove_boilerplate': True,
+        'html': ('<p>Read the <a href="/guide">guide</a> first.</p>'
+                 '<div><a href="/a">Alpha</a> <a href="/b">Beta</a> <a href="/c">Gamma</a> <a href="/d">Delta</a></div>'
+                 '<div><h2>See also</h2><a href="/a">Alpha</a> <a href="/b">Beta</a> <a href="/c">Gamma</a></div>'),
+        'expected': ('Read the [guide](https://example.com/guide) first.\n## See also\n'
+                     '[Alpha](https://example.com/a) [Beta](https://example.com/b) [Gamma](https://example.com/c)'),
+    },
+    {
+        # Unclosed blocks around a dropped nav; the content block is long enough to be kept early
+        'name': 'boilerplate-malformed-unclosed-blocks',
+        'remove_boilerplate': True,
+        'html': ('<div class="doc-content"><p>' + 'Long documentation text. ' * 140 +
+                 '<nav><a href="/">Home</a> <a href="/docs">Docs</a> <a href="/blog">Blog</a></nav> \n <ul><li>Item'),
+        'expected': 'Long documentation text. ' * 139 + 'Long documentation text.\n- Item',
+    },
+    {
+        'name': 'boilerplate-keeps-admonition',
+        'remove_boilerplate': True,
+        'html': ('<h2>Delete a project</h2><aside class="admonition warning"><p>Warning: deleting a project '
+                 'cannot be undone.</p></aside><p>Open the settings page and choose Delete.</p>'),
+        'expected': ('## Delete a project\nWarning: deleting a project cannot be undone.\n'
+                     'Open the settings page and choose Delete.'),
+    },
+    {
+        'name': 'boilerplate-keeps-menu-description',
+        'remove_boilerplate': True,
+        'html': ('<nav class="menu"><a href="/">Home</a> <a href="/api">API</a></nav>'
+                 '<h3>Menu.getItem(id)</h3><div class="menu-item-description">Returns the menu entry '
+                 'registered under the given id.</div>'),
+        'expected': '### Menu.getItem(id)\nReturns the menu entry registered under the given id.',
+    },
+    {
+        'name': 'boilerplate-keeps-linkless-footer',
+        'remove_boilerplate': True,
+        'html': ('<div class="doc-content"><h2>size()</h2><p>Counts the stored items.</p></div>'
+                 '<footer class="doc-footer">Parameters: none. Returns: int.</footer>'
+                 '<footer><a href="/terms">Terms</a> <a href="/privacy">Privacy</a></footer>'),
+        'expected': '## size()\nCounts the stored items.\nParameters: none. Returns: int.',
+    },
+]
+
+CORPUS_PARAMS = [
+    pytest.param(engine, case, id=f"{engine}-{case['name']}")
+    for engine in ENGINES
+    for case in CONVERSION_CORPUS
+    # Boilerplate removal is a stream engine feature
+    if engine == 'stream' or not case.get('remove_boilerplate')
+]
+
+STREAM_CASES = [pytest.param(case, id=case['name']) for case in CONVERSION_CORPUS]
+
+# Documents that end inside open blocks, links or tags, streamed with boilerplate removal on
+UNCLOSED_INPUTS = [
+    '<nav>x. Y z. alpha beta gamma\ndelta',
+    '<section class="menu">alpha <a href="/a">beta</a> gamma delta',
+    '</p> <footer>x. x. <div class="doc-content"><a href="/a">link</a> \n\n',
+    '<footer>Parameters: none. <a href="/int">Returns: int',
+    '<div><a href="/a">Alpha</a> <a href="/b">Beta</a> <a href="/c">Gam',
+    '<div class="doc-content"><h2>Title</h2><nav><a href="/">Home</a> <a href="/x">X</a></na',
+]
+# Every corpus case also cut off at a few points, usually mid-tag or mid-text
+TRUNCATED_INPUTS = [
+    case['html'][:len(case['html']) * cut // 4] for case in CONVERSION_CORPUS for cut in (1, 2, 3)
+]
+
+
+def normalize_markdown(markdown):
+    """Drop trailing whitespace and blank lines; leading whitespace carries nesting and indentation."""
+    lines = (line.rstrip() for line in markdown.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('engine,case', CORPUS_PARAMS)
+def test_corpus(markdown_converter, engine, case):
+    converter = markdown_converter.MarkdownConverter(
+        engine=engine, remove_boilerplate=case.get('remove_boilerplate', False))
+    assert normalize_markdown(converter.html_to_markdown(case['html'], BASE_URL)) == case['expected']
+
+
+@pytest.mark.parametrize('size', STREAMING_CHUNK_SIZES)
+@pytest.mark.parametrize('case', STREAM_CASES)
+def test_streamed_chunks_match_whole_document(markdown_converter, case, size):
+    converter = markdown_converter.MarkdownConverter(
+        engine='stream', remove_boilerplate=case.get('remove_boilerplate', False))
+    whole = converter.html_to_markdown(case['html'], BASE_URL)
+    assert ''.join(converter.iter_markdown(chunked(case['html'], size), BASE_URL)) == whole
+
+
+@pytest.mark.parametrize('size', STREAMING_CHUNK_SIZES)
+@pytest.mark.parametrize('html_content', UNCLOSED_INPUTS + TRUNCATED_INPUTS)
+def test_unclosed_input_streams_like_whole_document(markdown_converter, html_content, size):
+    converter = markdown_converter.MarkdownConverter(engine='stream', remove_boilerplate=True)
+    whole = converter.html_to_markdown(html_content, BASE_URL)
+    assert ''.join(converter.iter_markdown(chunked(html_content, size), BASE_URL)) == whole
+
+
+# Per-case time budget for structure-heavy input that made the old list/table regexes backtrack
+STRUCTURE_BUDGET_SECONDS = 2.0
+
+
+def pathological_inputs(rows=10000, depth=20):
+    nested_list = ''.join(f'<ul><li>level {i}' for i in range(depth)) + '</li></ul>' * depth
+    return {
+        f'table-{rows}-rows': '<table>' + ''.join(
+            f'<tr><td>row {i}</td><td><a href="/api/{i}">value {i}</a></td></tr>' for i in range(rows)) + '</table>',
+        f'table-{rows}-unclosed-rows': '<table>' + '<tr><td>cell</td>' * rows + '</table>',
+        f'nested-list-{depth}-levels-x500': nested_list * 500,
+        f'list-{rows}-unclosed': '<ul><li>item</li>' * rows,
+    }
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name,html_content', list(pathological_inputs().items()))
+def test_structure_heavy_input_within_budget(markdown_converter, engine, name, html_content):
+    converter = markdown_converter.MarkdownConverter(engine=engine)
+    start = time.perf_counter()
+    converter.html_to_markdown(html_content, BASE_URL)
+    assert time.perf_counter() - start <= STRUCTURE_BUDGET_SECONDS
+
+
+def failing_stream(self, chunks, base_url='', encoding='utf-8'):
+    yield 'partial output\n'
+    raise RuntimeError('stream failed')
+
+
+def test_failed_stream_falls_back_to_whole_document(markdown_converter, monkeypatch, tmp_path):
+    html_file = tmp_path / 'page.html'
+    html_file.write_text('<h1>Title</h1><p>Body text.</p>', encoding='utf-8')
+    output_file = tmp_path / 'out' / 'page.md'
+    monkeypatch.setattr(markdown_converter.MarkdownConverter, 'iter_markdown', failing_stream)
+
+    assert markdown_converter.convert_html_file(html_file, output_file, BASE_URL)
+    assert output_file.read_text(encoding='utf-8') == '# Title\n\nBody text.'
+    assert [path.name for path in output_file.parent.iterdir()] == ['page.md']
+
+
+def test_failed_conversion_keeps_previous_output(markdown_converter, monkeypatch, tmp_path):
+    html_file = tmp_path / 'page.html'
+    html_file.write_text('<h1>Title</h1>', encoding='utf-8')
+    output_file = tmp_path / 'page.md'
+    output_file.write_text('previous', encoding='utf-8')
+    monkeypatch.setattr(markdown_converter.MarkdownConverter, 'iter_markdown', failing_stream)
+    monkeypatch.setattr(markdown_converter.MarkdownConverter, 'html_to_markdown',
+                        lambda self, html_content, base_url='': 1 / 0)
+
+    assert not markdown_converter.convert_html_file(html_file, output_file, BASE_URL)
+    assert output_file.read_text(encoding='utf-8') == 'previous'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['page.html', 'page.md']
@@ -0,0 +1,79 @@
+"""DomainRateLimiter spacing shared by threads and processes through its state files."""
+
+import json
+import subprocess
+import sys
+import threading
+import time
+
+from conftest import SCRIPTS_DIR
+
+DELAY = 0.2
+
+ACQUIRER = '''
+import importlib.util, json, sys, time
+spec = importlib.util.spec_from_file_location('docs_fetch', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+limiter = module.DomainRateLimiter(module.Path(sys.argv[2]), delay=float(sys.argv[3]))
+while time.time() < float(sys.argv[4]):  # Start together once every process has imported
+    time.sleep(0.005)
+times = []
+for _ in range(int(sys.argv[5])):
+    limiter.acquire('example.com')
+    times.append(time.time())
+print(json.dumps(times))
+'''
+
+
+def assert_spaced(times, delay):
+    times = sorted(times)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    # Allow for scheduling jitter, but never two grants in the same slot
+    assert min(gaps) >= delay * 0.8, gaps
+
+
+def test_processes_share_one_bucket_per_domain(tmp_path):
+    start_at = time.time() + 1.5
+    acquirers = [
+        subprocess.Popen([sys.executable, '-c', ACQUIRER, str(SCRIPTS_DIR / 'docs-fetch.py'), str(tmp_path),
+                          str(DELAY), str(start_at), '3'], stdout=subprocess.PIPE, text=True)
+        for _ in range(3)
+    ]
+    times = []
+    for acquirer in acquirers:
+        output, _ = acquirer.communicate(timeout=60)
+        assert acquirer.returncode == 0
+        times.extend(json.loads(output))
+
+    assert len(times) == 9
+    assert_spaced(times, DELAY)
+    # The first grant is free; the other eight are spread over the following slots
+    assert max(times) - min(times) >= DELAY * 8 * 0.8
+
+
+def test_threads_share_one_bucket_per_domain(docs_fetch, tmp_path):
+    limiter = docs_fetch.DomainRateLimiter(tmp_path, delay=DELAY)
+    times = []
+
+    def acquire():
+        limiter.acquire('example.com')
+        times.append(time.time())
+
+    threads = [threading.Thread(target=acquire) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert_spaced(times, DELAY)
+
+
+def test_domains_do_not_wait_on_each_other(docs_fetch, tmp_path):
+    limiter = docs_fetch.DomainRateLimiter(tmp_path, delay=5)
+    start = time.monotonic()
+
+    for domain in ('a.example.com', 'b.example.com', 'c.example.com'):
+        limiter.acquire(domain)
+
+    assert time.monotonic() - start < 1
@@ -0,0 +1,141 @@
+"""HttpResponseCache revalidation with ETag and Last-Modified against a local HTTP server."""
+
+from conftest import send_body
+
+
+class Page:
+    """A route serving a body with validators and answering matching conditional requests with 304."""
+
+    def __init__(self, body, etag=None, last_modified=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def __call__(self, handler):
+        validators = {}
+        if self.etag:
+            validators['ETag'] = self.etag
+        if self.last_modified:
+            validators['Last-Modified'] = self.last_modified
+        if ((self.etag and handler.headers.get('If-None-Match') == self.etag) or
+                (self.last_modified and handler.headers.get('If-Modified-Since') == self.last_modified)):
+            send_body(handler, '', status=304, headers=validators)
+        else:
+            send_body(handler, self.body, headers=validators)
+
+
+def get(fetcher, url):
+    return fetcher._http_get(url, fetcher.fetch_profiles['simple'])
+
+
+def test_etag_revalidation_serves_cached_body(fetcher, http_server):
+    http_server.routes['/page'] = Page('<h1>Cached</h1>', etag='"v1"')
+    url = http_server.url('/page')
+
+    first = get(fetcher, url)
+    second = get(fetcher, url)
+
+    assert (first.body, first.from_cache) == (b'<h1>Cached</h1>', False)
+    assert (second.status, second.body, second.from_cache) == (200, b'<h1>Cached</h1>', True)
+    assert 'If-None-Match' not in http_server.requests[0][2]
+    assert http_server.requests[1][2]['If-None-Match'] == '"v1"'
+    assert second.headers['content-type'].startswith('text/html')
+
+
+def test_last_modified_revalidation(fetcher, http_server):
+    http_server.routes['/page'] = Page('<h1>Dated</h1>', last_modified='Wed, 01 Jan 2025 00:00:00 GMT')
+    url = http_server.url('/page')
+
+    get(fetcher, url)
+    second = get(fetcher, url)
+
+    assert second.from_cache
+    assert http_server.requests[1][2]['If-Modified-Since'] == 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+
+def test_changed_page_replaces_cached_body(fetcher, http_server):
+    page = Page('<h1>Old</h1>', etag='"v1"')
+    http_server.routes['/page'] = page
+    url = http_server.url('/page')
+    get(fetcher, url)
+
+    page.body, page.etag = '<h1>New</h1>', '"v2"'
+    changed = get(fetcher, url)
+    revalidated = get(fetcher, url)
+
+    assert (changed.body, changed.from_cache) == (b'<h1>New</h1>', False)
+    assert (revalidated.body, revalidated.from_cache) == (b'<h1>New</h1>', True)
+    assert http_server.requests[2][2]['If-None-Match'] == '"v2"'
+
+
+def test_responses_without_validators_are_not_cached(fetcher, http_server):
+    http_server.routes['/page'] = Page('<h1>Plain</h1>')
+    url = http_server.url('/page')
+
+    get(fetcher, url)
+    second = get(fetcher, url)
+
+    assert not second.from_cache
+    assert fetcher.response_cache.conditional_headers(url) == {}
+
+
+def test_refresh_skips_conditional_headers(fetcher, http_server):
+    http_server.routes['/page'] = Page('<h1>Cached</h1>', etag='"v1"')
+    url = http_server.url('/page')
+    get(fetcher, url)
+
+    fetcher.refresh_cache = True
+    refreshed = get(fetcher, url)
+
+    assert not refreshed.from_cache
+    assert 'If-None-Match' not in http_server.requests[1][2]
+
+
+def test_missing_cached_body_after_304_refetches_unconditionally(fetcher, http_server):
+    http_server.routes['/page'] = Page('<h1>Cached</h1>', etag='"v1"')
+    url = http_server.url('/page')
+    get(fetcher, url)
+    for body_file in fetcher.response_cache.cache_dir.glob('*.body'):
+        body_file.unlink()
+
+    response = get(fetcher, url)
+
+    assert (response.body, response.from_cache) == (b'<h1>Cached</h1>', False)
+    assert [('If-None-Match' in request[2]) for request in http_server.requests] == [False, True, False]
+
+
+def test_revalidation_across_fetcher_instances(fetcher, docs_fetch, http_server):
+    http_server.routes['/page'] = Page('<h1>Cached</h1>', etag='"v1"')
+    url = http_server.url('/page')
+    get(fetcher, url)
+
+    with docs_fetch.DocsFetcher(base_dir=str(fetcher.base_dir)) as other:
+        assert get(other, url).from_cache
+
+
+def test_validators_follow_redirects_to_the_final_url(fetcher, http_server):
+    http_server.routes['/old'] = lambda handler: send_body(handler, '', status=301,
+                                                            headers={'Location': '/new'})
+    http_server.routes['/new'] = Page('<h1>Moved</h1>', etag='"new"')
+
+    first = get(fetcher, http_server.url('/old'))
+    second = get(fetcher, http_server.url('/old'))
+
+    assert first.url == http_server.url('/new')
+    assert (second.body, second.from_cache, second.url) == (b'<h1>Moved</h1>', True, http_server.url('/new'))
+    old_requests, new_requests = http_server.requests_for('/old'), http_server.requests_for('/new')
+    assert all('If-None-Match' not in headers for _, _, headers in old_requests)
+    assert [headers.get('If-None-Match') for _, _, headers in new_requests] == [None, '"new"']
+
+
+def test_redirect_does_not_carry_the_original_urls_validators(fetcher, http_server):
+    http_server.routes['/page'] = Page('<h1>Original</h1>', etag='"shared"')
+    http_server.routes['/elsewhere'] = Page('<h1>Elsewhere</h1>', etag='"shared"')
+    get(fetcher, http_server.url('/page'))
+
+    http_server.routes['/page'] = lambda handler: send_body(handler, '', status=302,
+                                                             headers={'Location': '/elsewhere'})
+    response = get(fetcher, http_server.url('/page'))
+
+    assert (response.body, response.from_cache) == (b'<h1>Elsewhere</h1>', False)
+    assert 'If-None-Match' not in http_server.requests_for('/elsewhere')[0][2]
@@ -0,0 +1,71 @@
+"""Learned site pattern fields: cross-process updates and when fetch profiles are recorded."""
+
+import json
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR, send_body
+
+UPDATER = '''
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location('docs_fetch', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+fetcher = module.DocsFetcher(base_dir=sys.argv[2])
+for _ in range(int(sys.argv[4])):
+    with fetcher.patterns_lock:
+        fetcher._update_pattern_success(sys.argv[3], True)
+fetcher.close()
+'''
+
+GOOD_PAGE = '<html><body><main>' + (
+    '<h2>method()</h2><p>Reference documentation for this API function, with parameter '
+    'and usage details and an example of the installation guide.</p>'
+    '<pre><code>api.method(1)</code></pre>'
+) * 5 + '</main></body></html>'
+
+THIN_PAGE = '<html><body><div id="root">Loading...</div></body></html>'
+
+
+def run_updaters(base_dir, domain, processes=4, updates=10):
+    updaters = [
+        subprocess.Popen([sys.executable, '-c', UPDATER, str(SCRIPTS_DIR / 'docs-fetch.py'), str(base_dir),
+                          domain, str(updates)], stderr=subprocess.DEVNULL)
+        for _ in range(processes)
+    ]
+    assert all(updater.wait(timeout=120) == 0 for updater in updaters)
+
+
+def test_concurrent_overlay_updates_are_all_counted(docs_fetch, tmp_path):
+    fetcher = docs_fetch.DocsFetcher(base_dir=str(tmp_path))
+    builtin_count = fetcher.site_patterns['react.dev'].get('metadata', {}).get('usage_count', 0)
+    fetcher.close()
+    run_updaters(tmp_path, 'react.dev')
+
+    overlay = json.loads((tmp_path / '.site-patterns-learned.json').read_text(encoding='utf-8'))
+    assert overlay['react.dev']['metadata']['usage_count'] == builtin_count + 40
+
+
+def test_concurrent_pattern_file_updates_are_all_counted(tmp_path):
+    pattern_file = tmp_path / '.site-patterns' / 'docs.example.com.json'
+    pattern_file.parent.mkdir(parents=True)
+    pattern_file.write_text(json.dumps({'selectors': {'main_content': 'main'}}), encoding='utf-8')
+    run_updaters(tmp_path, 'docs.example.com')
+
+    assert json.loads(pattern_file.read_text(encoding='utf-8'))['metadata']['usage_count'] == 40
+    assert sorted(path.name for path in pattern_file.parent.iterdir()) == ['docs.example.com.json']
+
+
+def test_fetch_profile_recorded_only_for_valid_content(fetcher, http_server):
+    fetcher.max_retries = 1
+    http_server.routes['/thin'] = lambda handler: send_body(handler, THIN_PAGE)
+    http_server.routes['/good'] = lambda handler: send_body(handler, GOOD_PAGE)
+    domain = fetcher._get_domain(http_server.url('/thin'))
+
+    result = fetcher.fetch_page(http_server.url('/thin'))
+    assert result.ok and not result.quality['is_valid']
+    assert domain not in fetcher.pending_fetch_profiles
+
+    result = fetcher.fetch_page(http_server.url('/good'))
+    assert result.ok and result.quality['is_valid']
+    assert fetcher.pending_fetch_profiles[domain]['headers'] == 'simple'
@@ -0,0 +1,72 @@
+"""StagedPipeline bounded queues (backpressure), failures and shutdown."""
+
+import threading
+import time
+
+import pytest
+
+
+def stage_threads(names):
+    return [thread for thread in threading.enumerate() if thread.name.rsplit('-', 1)[0] in names]
+
+
+def test_slow_stage_holds_back_the_input(docs_fetch):
+    pulled = []
+    gate = threading.Event()
+
+    def items():
+        for i in range(50):
+            pulled.append(i)
+            yield i
+
+    def convert(item):
+        gate.wait(5)
+        return item * 10
+
+    pipeline = docs_fetch.StagedPipeline([('fetch', lambda item: item, 1), ('convert', convert, 1)], queue_size=2)
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(pipeline.run(items())))
+    runner.start()
+    time.sleep(0.3)
+
+    # Two queues of two, one item per worker and one the producer is blocked on
+    assert len(pulled) <= 7
+    gate.set()
+    runner.join(10)
+    assert sorted(results) == [i * 10 for i in range(50)]
+    assert pipeline.stats['convert']['items'] == 50
+    assert pipeline.stats['fetch']['blocked'] > 0.2
+
+
+def test_failed_and_dropped_items_do_not_stop_the_pipeline(docs_fetch):
+    def parse(item):
+        if item == 3:
+            raise ValueError('bad page')
+        return None if item % 2 else item
+
+    pipeline = docs_fetch.StagedPipeline([('parse', parse, 2), ('store', lambda item: item, 2)])
+
+    assert sorted(pipeline.run(range(10))) == [0, 2, 4, 6, 8]
+    assert pipeline.stats['parse']['items'] == 10
+    assert pipeline.stats['store']['items'] == 5
+
+
+def test_failing_input_shuts_every_stage_down(docs_fetch):
+    def items():
+        yield 1
+        yield 2
+        raise RuntimeError('listing failed')
+
+    pipeline = docs_fetch.StagedPipeline([('list', lambda item: item, 2), ('save', lambda item: item, 3)])
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(items())
+    assert pipeline.stats['save']['items'] == 2
+    assert stage_threads({'list', 'save'}) == []
+
+
+def test_run_returns_after_all_workers_exit(docs_fetch):
+    pipeline = docs_fetch.StagedPipeline([('a', lambda item: item + 1, 3), ('b', lambda item: item * 2, 2)], queue_size=1)
+
+    assert sorted(pipeline.run(range(20))) == sorted((i + 1) * 2 for i in range(20))
+    assert stage_threads({'a', 'b'}) == []
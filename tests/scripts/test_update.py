@@ -0,0 +1,106 @@
+"""--update revalidates stored sources and re-processes only pages whose content changed."""
+
+import json
+
+import pytest
+
+from conftest import send_body
+from test_response_cache import Page
+
+DOCUMENT = '<html><body><main>' + (
+    '<h2>method()</h2><p>Reference documentation for this API function, with parameter '
+    'and usage details and an example of the installation guide.</p>'
+    '<pre><code>api.method(1)</code></pre>'
+) * 5 + '</main></body></html>'
+
+
+@pytest.fixture
+def conversions(fetcher, monkeypatch):
+    """URLs passed to the converter, in order."""
+    converted = []
+    convert = fetcher._process_content_with_markdown_converter
+
+    def counting_convert(html_content, url):
+        converted.append(url)
+        return convert(html_content, url)
+
+    monkeypatch.setattr(fetcher, '_process_content_with_markdown_converter', counting_convert)
+    return converted
+
+
+def fetch_state(fetcher, library_name):
+    (state_file,) = fetcher.base_dir.glob(f'*/{library_name}/{fetcher.fetch_state_file}')
+    return json.loads(state_file.read_text(encoding='utf-8'))
+
+
+def test_unchanged_page_is_revalidated_and_reused(fetcher, http_server, conversions):
+    http_server.routes['/docs'] = Page(DOCUMENT, etag='"v1"')
+    url = http_server.url('/docs')
+
+    assert fetcher.fetch_documentation('mylib', url=url)
+    first_state = fetch_state(fetcher, 'mylib')
+    assert fetcher.fetch_documentation('mylib', update=True)
+
+    assert conversions == [url]
+    assert http_server.requests[-1][2]['If-None-Match'] == '"v1"'
+    assert fetch_state(fetcher, 'mylib')['pages'] == first_state['pages']
+
+
+def test_update_without_validators_reuses_identical_content(fetcher, http_server, conversions):
+    http_server.routes['/docs'] = Page(DOCUMENT)
+    url = http_server.url('/docs')
+
+    assert fetcher.fetch_documentation('mylib', url=url)
+    assert fetcher.fetch_documentation('mylib', update=True)
+
+    assert conversions == [url]
+
+
+def test_changed_page_is_reprocessed(fetcher, http_server, conversions):
+    page = Page(DOCUMENT, etag='"v1"')
+    http_server.routes['/docs'] = page
+    url = http_server.url('/docs')
+    assert fetcher.fetch_documentation('mylib', url=url)
+    first_fingerprint = fetch_state(fetcher, 'mylib')['pages'][url]['fingerprint']
+
+    page.body, page.etag = DOCUMENT.replace('method()', 'handler()'), '"v2"'
+    assert fetcher.fetch_documentation('mylib', update=True)
+
+    assert conversions == [url, url]
+    assert fetch_state(fetcher, 'mylib')['pages'][url]['fingerprint'] != first_fingerprint
+
+
+def test_failed_revalidation_keeps_previous_content(fetcher, http_server, conversions):
+    http_server.routes['/docs'] = Page(DOCUMENT, etag='"v1"')
+    url = http_server.url('/docs')
+    assert fetcher.fetch_documentation('mylib', url=url)
+    first_state = fetch_state(fetcher, 'mylib')
+
+    fetcher.max_retries = 1
+    http_server.routes['/docs'] = lambda handler: send_body(handler, 'gone', status=410)
+    assert fetcher.fetch_documentation('mylib', update=True)
+
+    assert conversions == [url]
+    assert fetch_state(fetcher, 'mylib')['pages'] == first_state['pages']
+
+
+def test_changed_settings_reprocess_unchanged_content(fetcher, http_server, conversions):
+    http_server.routes['/docs'] = Page(DOCUMENT, etag='"v1"')
+    url = http_server.url('/docs')
+    assert fetcher.fetch_documentation('mylib', url=url)
+
+    fetcher.remove_boilerplate = not fetcher.remove_boilerplate
+    assert fetcher.fetch_documentation('mylib', update=True)
+
+    assert conversions == [url, url]
+
+
+def test_changed_agent_chunk_size_reprocesses_unchanged_content(fetcher, http_server, conversions):
+    http_server.routes['/docs'] = Page(DOCUMENT, etag='"v1"')
+    url = http_server.url('/docs')
+    assert fetcher.fetch_documentation('mylib', url=url)
+
+    fetcher.agent_chunk_chars //= 2
+    assert fetcher.fetch_documentation('mylib', update=True)
+
+    assert conversions == [url, url]